@@ -0,0 +1,157 @@
+# analytics.py - Streak, gap, consistency and weekday analytics over active days
+#
+# A user's history for one collection is reduced to a sorted array of
+# distinct day ordinals (date.toordinal()), read from daily_rollups. Every
+# metric is then a pass over that array: NumPy when installed, otherwise
+# the same algorithms over array('i').
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+import models
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Collection -> daily_rollups column counting its entries per day
+ANALYTICS_SOURCES = {
+    "activities": "activity_count",
+    "nutrition": "nutrition_entries",
+    "sleep": "sleep_entries",
+    "mood": "mood_entries",
+    "meditation": "meditation_entries",
+    "hydration": "hydration_entries",
+}
+
+CONSISTENCY_WINDOWS = (7, 30)
+
+def day_ordinals(days: Iterable[date]):
+    """Sorted distinct ordinals of the given dates"""
+    if np is not None:
+        return np.unique(np.fromiter((day.toordinal() for day in days), dtype=np.int32))
+    return array("i", sorted({day.toordinal() for day in days}))
+
+def active_days_statement(user_id: int, collections: Sequence[str]) -> Select:
+    """Rollup rows (day, entry count per collection) of a user, oldest first"""
+    columns = [getattr(models.DailyRollup, ANALYTICS_SOURCES[name]) for name in collections]
+    return select(models.DailyRollup.day, *columns).where(
+        models.DailyRollup.user_id == user_id
+    ).order_by(models.DailyRollup.day)
+
+def split_active_days(rows: Sequence, collections: Sequence[str]) -> Dict[str, object]:
+    """Day ordinal array per collection from active_days_statement rows"""
+    if np is not None:
+        ordinals = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int32, count=len(rows))
+        counts = np.array([row[1:] for row in rows], dtype=np.int64).reshape(len(rows), len(collections))
+        return {name: ordinals[counts[:, i] > 0] for i, name in enumerate(collections)}
+    ordinals = [row[0].toordinal() for row in rows]
+    return {
+        name: array("i", (ordinal for ordinal, row in zip(ordinals, rows) if row[i + 1]))
+        for i, name in enumerate(collections)
+    }
+
+def runs(days) -> Tuple[list, list]:
+    """(first day, length) of every run of consecutive days"""
+    if len(days) == 0:
+        return [], []
+    if np is not None:
+        breaks = np.flatnonzero(np.diff(days) != 1) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(days)]))
+        return days[starts].tolist(), (ends - starts).tolist()
+    starts, lengths = [days[0]], [1]
+    for previous, day in zip(days, days[1:]):
+        if day - previous == 1:
+            lengths[-1] += 1
+        else:
+            starts.append(day)
+            lengths.append(1)
+    return starts, lengths
+
+def streaks(days) -> Dict[str, int]:
+    """Longest run of consecutive days and the run ending at the last day"""
+    _, lengths = runs(days)
+    if not lengths:
+        return {"trailing_streak": 0, "longest_streak": 0}
+    return {"trailing_streak": lengths[-1], "longest_streak": max(lengths)}
+
+def gaps(days) -> Dict[str, object]:
+    """Inactive stretches between active days: count, longest and mean length"""
+    if np is not None:
+        lengths = np.diff(days) - 1
+        lengths = lengths[lengths > 0]
+        count = int(lengths.size)
+        longest = int(lengths.max()) if count else 0
+        total = int(lengths.sum())
+    else:
+        lengths = [day - previous - 1 for previous, day in zip(days, days[1:]) if day - previous > 1]
+        count = len(lengths)
+        longest = max(lengths, default=0)
+        total = sum(lengths)
+    return {"gap_count": count, "longest_gap": longest, "average_gap": total / count if count else 0.0}
+
+def weekday_histogram(days) -> List[int]:
+    """Active days per weekday, Monday first"""
+    # date.fromordinal(1) is a Monday
+    if np is not None:
+        return np.bincount((days - 1) % 7, minlength=7).tolist()
+    histogram = [0] * 7
+    for day in days:
+        histogram[(day - 1) % 7] += 1
+    return histogram
+
+def consistency(days, end: int, window: int) -> float:
+    """Share of the window days ending at ordinal end that were active"""
+    if np is not None:
+        active = int(np.searchsorted(days, end, side="right") - np.searchsorted(days, end - window + 1))
+    else:
+        active = bisect_right(days, end) - bisect_left(days, end - window + 1)
+    return active / window
+
+def rolling_consistency(days, start: int, end: int, window: int) -> List[float]:
+    """consistency() for every day from ordinal start to end (inclusive)"""
+    first = start - window + 1
+    if np is not None:
+        in_range = days[(days >= first) & (days <= end)]
+        active = np.zeros(end - first + 1, dtype=np.int32)
+        active[in_range - first] = 1
+        totals = np.concatenate(([0], np.cumsum(active)))
+        return ((totals[window:] - totals[:-window]) / window).tolist()
+    active = set(days[bisect_left(days, first):bisect_right(days, end)])
+    series = []
+    count = sum(1 for day in range(first, start) if day in active)
+    for day in range(start, end + 1):
+        count += day in active
+        series.append(count / window)
+        count -= (day - window + 1) in active
+    return series
+
+def analyze(days, today: Optional[date] = None, rolling_days: int = 0) -> dict:
+    """All metrics for one collection's active days.
+
+    current_streak counts only while the last active day is today, like
+    UserStats. With rolling_days, rolling 7/30-day consistency is included
+    for each of the last rolling_days days.
+    """
+    end = (today or date.today()).toordinal()
+    result = {
+        "active_days": len(days),
+        "first_day": date.fromordinal(int(days[0])) if len(days) else None,
+        "last_day": date.fromordinal(int(days[-1])) if len(days) else None,
+        **streaks(days),
+        **gaps(days),
+        "weekday_histogram": weekday_histogram(days),
+    }
+    result["current_streak"] = result["trailing_streak"] if len(days) and int(days[-1]) == end else 0
+    for window in CONSISTENCY_WINDOWS:
+        result[f"consistency_{window}d"] = consistency(days, end, window)
+    if rolling_days:
+        result["rolling"] = {
+            f"{window}d": rolling_consistency(days, end - rolling_days + 1, end, window)
+            for window in CONSISTENCY_WINDOWS
+        }
+    return result
@@ -0,0 +1,191 @@
+# audit.py - Background, batched audit log writer
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+import models
+from database import SessionLocal
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+AUDIT_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT_SECONDS", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+class AuditWriter:
+    """Collects audit events in memory and bulk-inserts them from one thread.
+
+    Events are written when AUDIT_BATCH_SIZE are waiting or every
+    AUDIT_FLUSH_INTERVAL_SECONDS, whichever comes first. The queue is
+    bounded: when it is full, producers wait up to the enqueue timeout and
+    then write their event synchronously, so events are never dropped.
+    Async callers use enqueue_async(), which does that waiting and writing
+    on a worker thread instead of the event loop.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        max_queue: int = AUDIT_QUEUE_MAX,
+        enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write everything still queued and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+            self._thread = None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self._drain()
+
+    def enqueue(self, event: Dict[str, Any]):
+        """Queue one audit_logs row (column name -> value)"""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.sync_writes += 1
+            self._write([event])
+            return
+        with self._lock:
+            self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    async def enqueue_async(self, event: Dict[str, Any]):
+        """enqueue() for async handlers: never blocks the event loop"""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            await run_in_threadpool(self.enqueue, event)
+            return
+        with self._lock:
+            self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Block until every event queued so far has been written"""
+        if self._thread is None:
+            self._drain()
+            return
+        self._wakeup.set()
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+            if self._stopping:
+                return
+
+    def _drain(self):
+        while True:
+            batch: List[Dict[str, Any]] = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.AuditLog), rows)
+            db.commit()
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self.failed += len(rows)
+            logger.exception("Failed to write %d audit log rows", len(rows))
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "queued": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "batch_size": self.batch_size,
+                "flush_interval_seconds": self.flush_interval,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "sync_writes": self.sync_writes,
+                "failed": self.failed
+            }
+
+def audit_event(
+    user_id: int,
+    action: str,
+    details: Any = None,
+    resource_type: str = None,
+    resource_id: int = None,
+    ip_address: str = None,
+    user_agent: str = None,
+    timestamp: datetime = None
+) -> Dict[str, Any]:
+    """Build an audit_logs row; every event carries the same keys for executemany"""
+    return {
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "details": details,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "timestamp": timestamp or datetime.utcnow()
+    }
+
+# Shared writer used by main.log_user_action and auth.log_audit_event
+audit_writer = AuditWriter()
+atexit.register(audit_writer.stop)
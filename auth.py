@@ -1,13 +1,18 @@
 # auth.py - Enhanced version with Role-Based Access Control
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 import models
-from database import SessionLocal
+from database import SessionLocal, AsyncSessionLocal
+from cache import principal_cache
+from hashing import password_pool, PoolSaturated
+from audit import audit_writer, audit_event
 import os
 import uuid
 import hashlib
@@ -20,7 +25,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 TERMS_TOKEN_EXPIRE_HOURS = 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt work factor; stored hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_desired_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_desired_rounds=BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
 def get_db():
@@ -30,13 +44,54 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password operations, please retry",
+        headers={"Retry-After": "1"},
+    )
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_pool.run(pwd_context.verify, plain_password, hashed_password)
+    except PoolSaturated:
+        raise _password_pool_busy()
 
 def get_password_hash(password: str) -> str:
     """Generate a password hash."""
-    return pwd_context.hash(password)
+    try:
+        return password_pool.run(pwd_context.hash, password)
+    except PoolSaturated:
+        raise _password_pool_busy()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop."""
+    try:
+        return await password_pool.run_async(pwd_context.verify, plain_password, hashed_password)
+    except PoolSaturated:
+        raise _password_pool_busy()
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and, if the stored hash uses another cost, return a fresh hash.
+
+    Returns (valid, new_hash); new_hash is None when the stored hash is current.
+    """
+    try:
+        return await password_pool.run_async(pwd_context.verify_and_update, plain_password, hashed_password)
+    except PoolSaturated:
+        raise _password_pool_busy()
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop."""
+    try:
+        return await password_pool.run_async(pwd_context.hash, password)
+    except PoolSaturated:
+        raise _password_pool_busy()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token with role information."""
@@ -97,14 +152,42 @@ def verify_token(token: str, token_type: str = "access") -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def _principal_snapshot(user: models.User) -> dict:
+    """Column values of a user, enough to rebuild it without a query"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs}
+
+def _principal_from_snapshot(snapshot: dict, db: Session) -> models.User:
+    """Rebuild a cached user and attach it to the session as if it were loaded"""
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+def invalidate_principal(user_id: int):
+    """Drop cached principals of a user after their row (role, is_active, ...) changes"""
+    principal_cache.invalidate(user_id)
+
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security), 
     db: Session = Depends(get_db)
 ) -> models.User:
-    """Get the current authenticated user."""
+    """Get the current authenticated user.
+
+    Users resolved for a token are cached by the token's jti, so repeated
+    requests with the same token do not query the users table. The user id
+    is kept on request.state for request-level bookkeeping.
+    """
     token = credentials.credentials
     payload = verify_token(token, "access")
     username = payload.get("sub")
+    jti = payload.get("jti")
+
+    if jti:
+        snapshot = principal_cache.get(jti)
+        if snapshot is not None:
+            request.state.user_id = snapshot["id"]
+            return _principal_from_snapshot(snapshot, db)
     
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
@@ -120,7 +203,11 @@ def get_current_user(
             detail="Inactive user",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if jti:
+        principal_cache.set(jti, user.id, _principal_snapshot(user), payload.get("exp"))
     
+    request.state.user_id = user.id
     return user
 
 def get_current_active_user(
@@ -134,6 +221,62 @@ def get_current_active_user(
         )
     return current_user
 
+async def get_current_user_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """get_current_user() for async endpoints.
+
+    Same principal cache and checks, but the lookup on a cache miss goes
+    through the async engine, so authentication never needs a threadpool
+    worker.
+    """
+    token = credentials.credentials
+    payload = verify_token(token, "access")
+    username = payload.get("sub")
+    jti = payload.get("jti")
+
+    if jti:
+        snapshot = principal_cache.get(jti)
+        if snapshot is not None:
+            request.state.user_id = snapshot["id"]
+            return _principal_from_snapshot(snapshot, db.sync_session)
+
+    user = (await db.execute(
+        select(models.User).where(models.User.username == username)
+    )).scalars().first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if jti:
+        principal_cache.set(jti, user.id, _principal_snapshot(user), payload.get("exp"))
+
+    request.state.user_id = user.id
+    return user
+
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    """Get the current active user (async endpoints)."""
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return current_user
+
 # Role-based access control functions
 
 def get_user_permissions(user: models.User, db: Session) -> Dict[str, List[str]]:
@@ -183,28 +326,20 @@ def log_audit_event(
     user_agent: str = None,
     db: Session = None
 ):
-    """Log an audit event."""
-    if db is None:
-        db = SessionLocal()
-        close_db = True
-    else:
-        close_db = False
-    
-    try:
-        audit_log = models.AuditLog(
-            user_id=user.id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details or {},
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.add(audit_log)
-        db.commit()
-    finally:
-        if close_db:
-            db.close()
+    """Log an audit event.
+
+    The event is queued for the background audit writer; db is accepted for
+    backward compatibility and no longer committed here.
+    """
+    audit_writer.enqueue(audit_event(
+        user.id,
+        action,
+        details=details or {},
+        resource_type=resource_type,
+        resource_id=resource_id,
+        ip_address=ip_address,
+        user_agent=user_agent
+    ))
 
 # Role-based dependencies
 
@@ -355,11 +490,11 @@ def init_default_permissions(db: Session):
     db.commit()
 
 # Legacy functions for backward compatibility
-def create_terms_token(user_identifier: str) -> str:
+def create_terms_token(user_identifier: str, expires_delta: Optional[timedelta] = None) -> str:
     """Create a terms acceptance token."""
     to_encode = {
         "sub": user_identifier,
-        "exp": datetime.utcnow() + timedelta(hours=TERMS_TOKEN_EXPIRE_HOURS),
+        "exp": datetime.utcnow() + (expires_delta or timedelta(hours=TERMS_TOKEN_EXPIRE_HOURS)),
         "type": "terms",
         "iat": datetime.utcnow(),
         "jti": str(uuid.uuid4())
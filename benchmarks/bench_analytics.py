@@ -0,0 +1,138 @@
+# bench_analytics.py - Streak/consistency analytics over 10 years of daily history
+#
+# Usage: python benchmarks/bench_analytics.py [--users 20] [--years 10] [--repeat 20]
+#
+# Builds a throwaway SQLite database (never users.db) with years of daily
+# activities and wellness entries per user, fills daily_rollups, then times
+#   - the previous streak path: distinct activity days + Python loop
+#     (activities only, longest/trailing streak only)
+#   - analytics.analyze() for all six collections from one rollup query,
+#     with NumPy and with the array('i') fallback
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+import analytics
+import models
+from rollups import rebuild_daily_rollups
+
+# Chance that a day has an entry, per collection
+DAILY_PROBABILITY = {
+    models.Activity: 0.8,
+    models.NutritionEntry: 0.95,
+    models.SleepEntry: 0.9,
+    models.MoodEntry: 0.6,
+    models.MeditationEntry: 0.4,
+    models.HydrationEntry: 0.97,
+}
+
+def _row(model, user_id: int, when: datetime) -> dict:
+    day = when.date()
+    if model is models.Activity:
+        return {"user_id": user_id, "activity_name": "run", "duration": 30, "calories_burned": 300, "date": when}
+    if model is models.NutritionEntry:
+        return {"user_id": user_id, "meal_type": "lunch", "food_items": "rice", "calories": 600, "date": day}
+    if model is models.SleepEntry:
+        return {"user_id": user_id, "bedtime": when, "wake_time": when, "sleep_quality": 7, "sleep_duration": 420, "date": day}
+    if model is models.MoodEntry:
+        return {"user_id": user_id, "mood_rating": 7, "mood_type": "calm", "date": day}
+    if model is models.MeditationEntry:
+        return {"user_id": user_id, "duration": 15, "meditation_type": "breath", "date": day}
+    return {"user_id": user_id, "water_intake": 2.0, "time_logged": when, "date": day}
+
+def populate(engine, users: int, days: int):
+    """Seed users with one entry per active day in every collection"""
+    rng = random.Random(42)
+    start = datetime.combine(date.today() - timedelta(days=days - 1), datetime.min.time()) + timedelta(hours=9)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com",
+             "hashed_password": "x", "role": "admin"}
+            for u in range(1, users + 1)
+        ])
+        for user_id in range(1, users + 1):
+            for model, probability in DAILY_PROBABILITY.items():
+                conn.execute(model.__table__.insert(), [
+                    _row(model, user_id, start + timedelta(days=d))
+                    for d in range(days) if rng.random() < probability
+                ])
+
+def legacy_loop(activity_dates):
+    """The streak loop analytics replaced (trailing and longest streak only)"""
+    longest_streak = 0
+    temp_streak = 1
+    for i in range(len(activity_dates) - 1):
+        if (activity_dates[i + 1] - activity_dates[i]).days == 1:
+            temp_streak += 1
+        else:
+            longest_streak = max(longest_streak, temp_streak)
+            temp_streak = 1
+    return temp_streak, max(longest_streak, temp_streak)
+
+def legacy_streaks(db, user_id: int):
+    rows = db.query(func.date(models.Activity.date)).filter(models.Activity.user_id == user_id).distinct().all()
+    return legacy_loop(sorted(datetime.strptime(row[0], "%Y-%m-%d").date() for row in rows))
+
+def all_collections(db, user_id: int, today: date):
+    collections = list(analytics.ANALYTICS_SOURCES)
+    rows = db.execute(analytics.active_days_statement(user_id, collections)).all()
+    return {name: analytics.analyze(days, today, 30) for name, days in analytics.split_active_days(rows, collections).items()}
+
+def timed(label: str, fn, users: int, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for user_id in range(1, users + 1):
+            fn(user_id)
+    ms = (time.perf_counter() - started) * 1000 / (repeat * users)
+    print(f"  {label:<48} {ms:8.3f} ms/user")
+    return ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streak and consistency analytics")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    days = args.years * 365 + args.years // 4
+    numpy = analytics.np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Populating {args.users} users x {days} days x {len(DAILY_PROBABILITY)} collections...")
+        populate(engine, args.users, days)
+        db = sessionmaker(bind=engine)()
+        rebuild_daily_rollups(db)
+        db.commit()
+        today = date.today()
+
+        # Compute only, on one user's preloaded activity days
+        dates = [row[0] for row in db.query(models.DailyRollup.day).filter(
+            models.DailyRollup.user_id == 1, models.DailyRollup.activity_count > 0)]
+        print(f"\nCompute only ({len(dates)} active days, streaks + gaps + 7/30d consistency + weekdays + 30 rolling days):")
+        timed("previous: streak loop over dates", lambda _: legacy_loop(dates), 1, args.repeat * args.users)
+        backends = [("numpy", numpy), ("array('i')", None)] if numpy is not None else [("array('i')", None)]
+        for label, module in backends:
+            analytics.np = module
+            ordinals = analytics.day_ordinals(dates)
+            timed(f"analyze() [{label}]", lambda _: analytics.analyze(ordinals, today, 30), 1, args.repeat * args.users)
+
+        print("\nPer request (database read included):")
+        analytics.np = numpy
+        timed("previous: activity streaks only", lambda u: legacy_streaks(db, u), args.users, args.repeat)
+        for label, module in backends:
+            analytics.np = module
+            timed(f"analytics: all 6 collections [{label}]", lambda u: all_collections(db, u, today), args.users, args.repeat)
+        analytics.np = numpy
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# bench_async.py - Threadpool (def + Session) vs async (async def + AsyncSession) read latency
+#
+# Usage: python benchmarks/bench_async.py [--concurrency 500] [--requests 5000]
+#
+# Seeds a throwaway SQLite file, starts uvicorn in a subprocess serving the
+# same activity-list page two ways, and drives each with `concurrency`
+# keep-alive connections:
+#   /threadpool/{user_id}  sync handler, create_db_engine() + paginate()
+#   /async/{user_id}       async handler, create_async_db_engine() + paginate_async()
+# Latency is measured per request on the client side and reported as
+# p50/p99/max plus throughput. Requires aiosqlite and uvicorn.
+#
+# Both sides use the pools the API ships with (DB_POOL_SIZE/DB_MAX_OVERFLOW
+# for sync, ASYNC_DB_POOL_SIZE/ASYNC_DB_MAX_OVERFLOW for async) unless
+# --sync-pool-size/--async-pool-size override them; the sizes used are
+# printed with the results. The sync session is closed by the dependency's
+# teardown, which needs a threadpool worker of its own: with fewer pooled
+# connections than clients, every worker can end up in a handler waiting for
+# a connection only a teardown could return, and requests stall on
+# DB_POOL_TIMEOUT. Pass --sync-pool-size at least --concurrency to measure
+# the threadpool without that starvation.
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def populate(url: str, users: int, rows: int):
+    """Seed users and activity history"""
+    import models
+    from database import create_db_engine
+
+    engine = create_db_engine(url)
+    now = datetime.now()
+    rng = random.Random(42)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com",
+             "hashed_password": "x", "role": "exercise_tracker"}
+            for u in range(1, users + 1)
+        ])
+        conn.execute(models.Activity.__table__.insert(), [
+            {"user_id": rng.randint(1, users), "activity_name": "run", "duration": 30,
+             "calories_burned": rng.randint(50, 800), "date": now - timedelta(hours=i)}
+            for i in range(users * rows)
+        ])
+    engine.dispose()
+
+def build_app(url: str, sync_pool_size: int, async_pool_size: int):
+    """The same page served by a threadpool handler and an async handler"""
+    from typing import List
+    from fastapi import Depends, FastAPI, Response
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from sqlalchemy.orm import Session, sessionmaker
+    import models, schemas
+    from database import create_async_db_engine, create_db_engine
+    from pagination import paginate, paginate_async
+
+    SessionLocal = sessionmaker(autoflush=False, bind=create_db_engine(url, pool_size=sync_pool_size))
+    AsyncSessionLocal = async_sessionmaker(create_async_db_engine(url, pool_size=async_pool_size), class_=AsyncSession, autoflush=False)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/threadpool/{user_id}", response_model=List[schemas.ActivityOut])
+    def threadpool_page(user_id: int, response: Response, db: Session = Depends(get_db)):
+        query = db.query(models.Activity).filter(models.Activity.user_id == user_id)
+        return paginate(query, models.Activity.date, models.Activity.id, response, limit=20)
+
+    @app.get("/async/{user_id}", response_model=List[schemas.ActivityOut])
+    async def async_page(user_id: int, response: Response, db: AsyncSession = Depends(get_async_db)):
+        query = select(models.Activity).where(models.Activity.user_id == user_id)
+        return await paginate_async(db, query, models.Activity.date, models.Activity.id, response, limit=20)
+
+    return app
+
+def serve(url: str, port: int, sync_pool_size: int, async_pool_size: int):
+    import uvicorn
+
+    uvicorn.run(build_app(url, sync_pool_size, async_pool_size), host="127.0.0.1", port=port, log_level="warning",
+                limit_concurrency=None, backlog=4096)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def fetch(reader, writer, host: str, path: str) -> int:
+    """One keep-alive HTTP/1.1 GET on an open connection; returns the status code"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+async def wait_for_server(port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return
+    raise RuntimeError("benchmark server did not start")
+
+async def run_load(port: int, path: str, users: int, concurrency: int, total: int):
+    """Return (sorted latencies in ms, errors, elapsed seconds).
+
+    Each of the `concurrency` workers holds its own keep-alive connection,
+    so the server really sees that many concurrent clients. A bare asyncio
+    client keeps the load generator cheap next to the server.
+    """
+    rng = random.Random(7)
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    host = f"127.0.0.1:{port}"
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await fetch(reader, writer, host, f"{path}/{rng.randint(1, users)}")
+                except (OSError, asyncio.IncompleteReadError):
+                    errors += 1
+                    writer.close()
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                    continue
+                if status != 200:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return latencies, errors, elapsed
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    from database import ASYNC_DB_MAX_OVERFLOW, ASYNC_DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+    parser = argparse.ArgumentParser(description="Compare threadpool and async handler latency under concurrency")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=100, help="activities per user")
+    parser.add_argument("--sync-pool-size", type=int, default=DB_POOL_SIZE, help="default: DB_POOL_SIZE")
+    parser.add_argument("--async-pool-size", type=int, default=ASYNC_DB_POOL_SIZE, help="default: ASYNC_DB_POOL_SIZE")
+    parser.add_argument("--serve", metavar="URL", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.sync_pool_size, args.async_pool_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        populate(url, args.users, args.rows)
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", url, "--port", str(port),
+                                   "--sync-pool-size", str(args.sync_pool_size),
+                                   "--async-pool-size", str(args.async_pool_size)])
+        pools = {
+            "threadpool": f"pool {args.sync_pool_size}+{DB_MAX_OVERFLOW}",
+            "async": f"pool {args.async_pool_size}+{ASYNC_DB_MAX_OVERFLOW}",
+        }
+        if args.sync_pool_size + DB_MAX_OVERFLOW < args.concurrency:
+            print(f"note: the sync pool ({pools['threadpool']}) is smaller than --concurrency {args.concurrency}; "
+                  f"the threadpool run can stall on DB_POOL_TIMEOUT (see the header of this script)")
+        try:
+            asyncio.run(wait_for_server(port))
+            for label, path in [("threadpool", "/threadpool"), ("async", "/async")]:
+                # Warm both pools before measuring
+                asyncio.run(run_load(port, path, args.users, min(args.concurrency, 50), 200))
+                latencies, errors, elapsed = asyncio.run(
+                    run_load(port, path, args.users, args.concurrency, args.requests)
+                )
+                print(f"{label:>10}: p50 {percentile(latencies, 0.50):8.1f} ms  p99 {percentile(latencies, 0.99):8.1f} ms  "
+                      f"max {latencies[-1] if latencies else float('nan'):8.1f} ms  {len(latencies) / elapsed:8.1f} req/s  "
+                      f"{errors} errors ({args.concurrency} connections, {pools[label]})")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
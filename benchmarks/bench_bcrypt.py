@@ -0,0 +1,64 @@
+# bench_bcrypt.py - bcrypt hashes/sec per cost factor on this host
+#
+# Usage: python benchmarks/bench_bcrypt.py [--rounds 10 11 12 13] [--seconds 2]
+#
+# Reports single-thread latency and throughput, then the throughput of the
+# password hashing pool (PASSWORD_HASH_WORKERS threads) for each cost, to
+# help choose BCRYPT_ROUNDS: pick the highest cost whose per-login latency
+# and pool throughput still fit the expected login rate.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from passlib.context import CryptContext
+from hashing import HashingPool, PASSWORD_HASH_WORKERS
+
+PASSWORD = "correct horse battery staple"
+
+def single_thread(context: CryptContext, seconds: float):
+    """Return (hashes, elapsed) for sequential hashing"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        context.hash(PASSWORD)
+        count += 1
+    return count, time.perf_counter() - start
+
+def pooled(context: CryptContext, pool: HashingPool, seconds: float):
+    """Return (hashes, elapsed) keeping every pool worker busy"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        futures = [pool.submit(context.hash, PASSWORD) for _ in range(pool.workers)]
+        for future in futures:
+            future.result()
+        count += len(futures)
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt cost factors")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per measurement")
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    pool = HashingPool(workers=args.workers, max_pending=args.workers)
+    print(f"cpu_count={os.cpu_count()} pool_workers={args.workers}")
+    print(f"{'rounds':>6} {'ms/hash':>9} {'hashes/s':>9} {'pool hashes/s':>14}")
+    try:
+        for rounds in args.rounds:
+            context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+            context.hash(PASSWORD)  # warm up
+
+            count, elapsed = single_thread(context, args.seconds)
+            pool_count, pool_elapsed = pooled(context, pool, args.seconds)
+            print(f"{rounds:>6} {elapsed * 1000 / count:>9.1f} {count / elapsed:>9.1f} "
+                  f"{pool_count / pool_elapsed:>14.1f}")
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# bench_indexes.py - Query plans and timings before/after the per-user composite indexes
+#
+# Usage: python benchmarks/bench_indexes.py [--users 100] [--rows 500]
+#
+# Builds a throwaway SQLite database (never users.db), drops the composite
+# indexes to mimic a pre-migration database, measures the hot list/summary
+# queries, then runs migrations.run_migrations() and measures again.
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, text
+import models
+from migrations import run_migrations
+
+# Indexes declared in __table_args__ (as opposed to Column(index=True))
+ACCESS_PATTERN_INDEXES = [
+    index.name
+    for table in models.Base.metadata.sorted_tables
+    for index in table.indexes
+    if not any(column.index for column in index.columns)
+]
+
+QUERIES = {
+    "activities page": (
+        "SELECT * FROM activities WHERE user_id = :user_id "
+        "ORDER BY date DESC, id DESC LIMIT 100"
+    ),
+    "activities 30-day rollup": (
+        "SELECT activity_name, count(*), sum(calories_burned), sum(duration) FROM activities "
+        "WHERE user_id = :user_id AND date >= :since GROUP BY activity_name"
+    ),
+    "sleep entries page": (
+        "SELECT * FROM sleep_entries WHERE user_id = :user_id "
+        "ORDER BY date DESC, id DESC LIMIT 100"
+    ),
+    "active goals": (
+        "SELECT * FROM goals WHERE user_id = :user_id AND status = 'active'"
+    ),
+    "audit logs by user": (
+        "SELECT * FROM audit_logs WHERE user_id = :user_id "
+        "ORDER BY timestamp DESC, id DESC LIMIT 100"
+    ),
+    "audit logs by action": (
+        "SELECT * FROM audit_logs WHERE action = 'LOGIN' "
+        "ORDER BY timestamp DESC, id DESC LIMIT 100"
+    ),
+}
+
+def populate(engine, users: int, rows: int):
+    """Fill the benchmark database with synthetic per-user history"""
+    now = datetime.now()
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com",
+             "hashed_password": "x", "role": "exercise_tracker"}
+            for u in range(1, users + 1)
+        ])
+        for u in range(1, users + 1):
+            conn.execute(models.Activity.__table__.insert(), [
+                {"user_id": u, "activity_name": rng.choice(["run", "walk", "swim", "yoga"]),
+                 "duration": rng.randint(10, 90), "calories_burned": rng.randint(50, 800),
+                 "date": now - timedelta(days=i // 2, hours=rng.randint(0, 23))}
+                for i in range(rows)
+            ])
+            conn.execute(models.SleepEntry.__table__.insert(), [
+                {"user_id": u, "bedtime": now, "wake_time": now, "sleep_quality": rng.randint(1, 10),
+                 "date": (now - timedelta(days=i)).date()}
+                for i in range(rows)
+            ])
+            conn.execute(models.Goal.__table__.insert(), [
+                {"user_id": u, "goal_type": "total_calories", "target_value": 1000.0,
+                 "status": rng.choice(["active", "completed", "paused"])}
+                for _ in range(10)
+            ])
+            conn.execute(models.AuditLog.__table__.insert(), [
+                {"user_id": u, "action": rng.choice(["LOGIN", "TRACK_SLEEP", "TRACK_MOOD"]),
+                 "details": "{}", "timestamp": now - timedelta(minutes=i)}
+                for i in range(rows)
+            ])
+
+def measure(engine, users: int, repeat: int = 20):
+    """Return {query: (plan, avg_ms)} averaged over random users"""
+    rng = random.Random(7)
+    params = {"since": datetime.now() - timedelta(days=30)}
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            params["user_id"] = rng.randint(1, users)
+            plan = " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params))
+            start = time.perf_counter()
+            for _ in range(repeat):
+                params["user_id"] = rng.randint(1, users)
+                conn.execute(text(sql), params).fetchall()
+            results[name] = (plan, (time.perf_counter() - start) * 1000 / repeat)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-user composite indexes")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=500, help="rows per user per table")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for name in ACCESS_PATTERN_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+        print(f"Populating {args.users} users x {args.rows} rows per table...")
+        populate(engine, args.users, args.rows)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+        before = measure(engine, args.users)
+        run_migrations(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = measure(engine, args.users)
+
+        for name in QUERIES:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f"\n{name}: {ms_before:.2f} ms -> {ms_after:.2f} ms ({ms_before / max(ms_after, 1e-6):.1f}x)")
+            print(f"  before: {plan_before}")
+            print(f"  after:  {plan_after}")
+
+if __name__ == "__main__":
+    main()
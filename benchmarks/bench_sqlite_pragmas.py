@@ -0,0 +1,116 @@
+# bench_sqlite_pragmas.py - Concurrent read/write throughput, default engine vs create_db_engine()
+#
+# Usage: python benchmarks/bench_sqlite_pragmas.py [--readers 8] [--writers 2] [--seconds 5]
+#
+# Runs reader threads (activity list page for a random user) and writer
+# threads (insert one activity and commit) against a throwaway SQLite file,
+# first with a bare create_engine() (rollback journal, default pragmas and
+# pool) and then with database.create_db_engine() (WAL, synchronous=NORMAL,
+# mmap, cache_size, busy_timeout, pool sized for the threadpool).
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+import models
+from database import create_db_engine
+
+READ_SQL = text(
+    "SELECT * FROM activities WHERE user_id = :user_id "
+    "ORDER BY date DESC, id DESC LIMIT 50"
+)
+
+def populate(engine, users: int, rows: int):
+    """Seed users and activity history"""
+    now = datetime.now()
+    rng = random.Random(42)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com",
+             "hashed_password": "x", "role": "exercise_tracker"}
+            for u in range(1, users + 1)
+        ])
+        conn.execute(models.Activity.__table__.insert(), [
+            {"user_id": rng.randint(1, users), "activity_name": "run", "duration": 30,
+             "calories_burned": rng.randint(50, 800), "date": now - timedelta(hours=i)}
+            for i in range(users * rows)
+        ])
+
+def run_load(engine, users: int, readers: int, writers: int, seconds: float):
+    """Return (reads, writes, errors) completed within the time budget"""
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader(seed):
+        rng = random.Random(seed)
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ_SQL, {"user_id": rng.randint(1, users)}).fetchall()
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer(seed):
+        rng = random.Random(seed)
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(models.Activity.__table__.insert(), {
+                        "user_id": rng.randint(1, users), "activity_name": "walk", "duration": 20,
+                        "calories_burned": 100, "date": datetime.now()
+                    })
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts["reads"], counts["writes"], counts["errors"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite engine settings under concurrent load")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=200, help="activities per user")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, factory in [
+            ("default engine", lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+            ("create_db_engine", create_db_engine),
+        ]:
+            url = f"sqlite:///{os.path.join(tmp, label.replace(' ', '_') + '.db')}"
+            engine = factory(url)
+            populate(engine, args.users, args.rows)
+            reads, writes, errors = run_load(engine, args.users, args.readers, args.writers, args.seconds)
+            engine.dispose()
+            print(f"{label:>16}: {reads / args.seconds:8.1f} reads/s {writes / args.seconds:8.1f} writes/s "
+                  f"{errors} errors ({args.readers} readers, {args.writers} writers)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# bulk.py - Bulk import helpers: JSON array / NDJSON bodies and chunked inserts
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))  # rows per executemany / transaction
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))  # rows accepted per request
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", "100"))
+
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+}
+
+class BulkResult:
+    """Counters and per-row errors of one bulk request"""
+
+    def __init__(self, max_errors: int = BULK_MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, index: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"index": index, "detail": detail})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+def _parse_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+    """Yield (index, record, parse_error) for each record of the request body.
+
+    NDJSON bodies (one JSON object per line) are parsed as they stream in,
+    so memory does not grow with the upload; a malformed line is reported
+    for that line only. Anything else must be a JSON array.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    record, error = _parse_line(line)
+                    yield index, record, error
+                    index += 1
+        if buffer.strip():
+            record, error = _parse_line(buffer)
+            yield index, record, error
+        return
+
+    try:
+        records = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON (application/x-ndjson)"
+        )
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON (application/x-ndjson)"
+        )
+    for index, record in enumerate(records):
+        yield index, record, None
+
+def validate_record(schema: Type[BaseModel], record: Any) -> Tuple[Optional[dict], Optional[str]]:
+    """Validate one record with a Create schema; returns (values, error)"""
+    if not isinstance(record, dict):
+        return None, "Expected a JSON object"
+    try:
+        return schema.model_validate(record).model_dump(), None
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        )
+
+def insert_chunk(
+    db: Session,
+    table: Table,
+    rows: List[Tuple[int, dict]],
+    result: BulkResult,
+    before_commit: Optional[Callable[[List[dict]], None]] = None
+):
+    """Insert (index, values) rows with one executemany and commit.
+
+    before_commit(inserted values) runs in the same transaction, so
+    bookkeeping derived from the rows (collection versions, rollups) is
+    committed together with them or not at all. If the chunk is rejected
+    as a whole, each row is tried on its own in a rolled-back transaction
+    so a bad row only fails itself; the rest are then inserted together.
+    """
+    if not rows:
+        return
+    if _commit_rows(db, table, [values for _, values in rows], before_commit):
+        result.inserted += len(rows)
+        return
+
+    accepted = []
+    for index, values in rows:
+        try:
+            db.execute(table.insert(), values)
+            accepted.append((index, values))
+        except SQLAlchemyError as e:
+            result.error(index, f"Database error: {e.__class__.__name__}")
+        finally:
+            db.rollback()
+
+    if not accepted:
+        return
+    if _commit_rows(db, table, [values for _, values in accepted], before_commit):
+        result.inserted += len(accepted)
+    else:
+        for index, _ in accepted:
+            result.error(index, "Database error: chunk could not be committed")
+
+def _commit_rows(
+    db: Session,
+    table: Table,
+    rows: List[dict],
+    before_commit: Optional[Callable[[List[dict]], None]]
+) -> bool:
+    """One executemany (plus before_commit) in one transaction; False if rolled back"""
+    try:
+        db.execute(table.insert(), rows)
+        if before_commit is not None:
+            before_commit(rows)
+        db.commit()
+        return True
+    except SQLAlchemyError:
+        db.rollback()
+        return False
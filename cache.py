@@ -0,0 +1,235 @@
+# cache.py - Per-user response and principal caches for hot read paths
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+DASHBOARD_CACHE_MAX_USERS = int(os.getenv("DASHBOARD_CACHE_MAX_USERS", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_TOKENS = int(os.getenv("PRINCIPAL_CACHE_MAX_TOKENS", "10000"))
+
+class CacheBackend:
+    """Storage interface for the response cache.
+
+    Entries are grouped by namespace (the user id) so that every cached view
+    of a user can be dropped at once when that user writes. A shared backend
+    (e.g. Redis hashes with EXPIRE) can implement the same four methods.
+    """
+
+    def get(self, namespace: Hashable, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: Hashable, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def invalidate(self, namespace: Hashable):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU over namespaces with a TTL per entry"""
+
+    def __init__(self, max_namespaces: int = DASHBOARD_CACHE_MAX_USERS):
+        self.max_namespaces = max_namespaces
+        self._data: "OrderedDict[Hashable, Dict[str, tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, namespace, key):
+        now = time.monotonic()
+        with self._lock:
+            entries = self._data.get(namespace)
+            if entries is None:
+                return None
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del entries[key]
+                self.expirations += 1
+                if not entries:
+                    del self._data[namespace]
+                return None
+            self._data.move_to_end(namespace)
+            return value
+
+    def set(self, namespace, key, value, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            entries = self._data.get(namespace)
+            if entries is None:
+                entries = self._data[namespace] = {}
+            entries[key] = (expires_at, value)
+            self._data.move_to_end(namespace)
+            while len(self._data) > self.max_namespaces:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._data.pop(namespace, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "namespaces": len(self._data),
+                "entries": sum(len(entries) for entries in self._data.values()),
+                "max_namespaces": self.max_namespaces,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+class ResponseCache:
+    """Caches assembled response payloads per user with hit/miss counters"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = DASHBOARD_CACHE_TTL_SECONDS):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.enabled = ttl > 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, view: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(user_id, view)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, user_id: int, view: str, value: Any):
+        if self.enabled:
+            self.backend.set(user_id, view, value, self.ttl)
+
+    def invalidate(self, user_id: int):
+        """Drop every cached view of a user; call after their writes commit"""
+        self.backend.invalidate(user_id)
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations
+            }
+        counters["backend"] = self.backend.stats()
+        return counters
+
+class PrincipalCache:
+    """Resolved users keyed by access-token jti.
+
+    Entries live for at most ttl seconds and never past the token's own
+    expiry. A reverse index from user id to jtis lets every token of a user
+    be dropped when that user's row changes.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, max_tokens: int = PRINCIPAL_CACHE_MAX_TOKENS):
+        self.ttl = ttl
+        self.enabled = ttl > 0
+        self.max_tokens = max_tokens
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_user: Dict[int, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, jti: str):
+        _, user_id, _ = self._data.pop(jti)
+        jtis = self._by_user.get(user_id)
+        if jtis is not None:
+            jtis.discard(jti)
+            if not jtis:
+                del self._by_user[user_id]
+
+    def get(self, jti: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(jti)
+            if entry is not None and entry[0] <= time.time():
+                self._drop(jti)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(jti)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, jti: str, user_id: int, value: Any, token_expires_at: Optional[float] = None):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            if jti in self._data:
+                self._drop(jti)
+            self._data[jti] = (expires_at, user_id, value)
+            self._by_user.setdefault(user_id, set()).add(jti)
+            while len(self._data) > self.max_tokens:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        """Forget every cached token of a user; call after their row changes"""
+        with self._lock:
+            for jti in list(self._by_user.get(user_id, ())):
+                self._drop(jti)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl,
+                "tokens": len(self._data),
+                "users": len(self._by_user),
+                "max_tokens": self.max_tokens,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+# Shared cache for /dashboard, /stats and /wellness/summary
+dashboard_cache = ResponseCache()
+
+# Shared cache of authenticated users for auth.get_current_user
+principal_cache = PrincipalCache()
@@ -0,0 +1,91 @@
+# etags.py - Conditional GET (ETag / If-None-Match) support for list endpoints
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+from auth import get_current_active_user_async
+from replica import get_async_read_db
+
+def bump_collection_version(db: Session, user_id: int, collection: str):
+    """Give a user's collection a new version token.
+
+    Call before committing a write so the version changes in the same
+    transaction as the data it describes.
+    """
+    version = uuid.uuid4().hex
+    updated = db.query(models.CollectionVersion).filter(
+        models.CollectionVersion.user_id == user_id,
+        models.CollectionVersion.collection == collection
+    ).update({"version": version, "updated_at": datetime.utcnow()}, synchronize_session=False)
+
+    if not updated:
+        db.add(models.CollectionVersion(user_id=user_id, collection=collection, version=version))
+
+def get_collection_version(db: Session, user_id: int, collection: str) -> str:
+    """Current version token of a user's collection ("0" if never written)"""
+    version = db.query(models.CollectionVersion.version).filter(
+        models.CollectionVersion.user_id == user_id,
+        models.CollectionVersion.collection == collection
+    ).scalar()
+    return version or "0"
+
+async def get_collection_version_async(db: AsyncSession, user_id: int, collection: str) -> str:
+    """get_collection_version() through an async session"""
+    version = await db.scalar(select(models.CollectionVersion.version).where(
+        models.CollectionVersion.user_id == user_id,
+        models.CollectionVersion.collection == collection
+    ))
+    return version or "0"
+
+def make_etag(version: str, user_id: int, request: Request) -> str:
+    """Weak ETag over the collection version and the normalised query string"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{user_id}:{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def conditional_get(collection: str):
+    """Dependency factory: answer 304 Not Modified when the client's ETag is current.
+
+    Declare it after the endpoint's permission dependency. On a match the
+    request ends before any collection rows are loaded; otherwise the ETag
+    is attached to the normal response. The version is read through the
+    request's read session (get_async_read_db), so it describes the same
+    snapshot (replica or primary) as the rows the async endpoint returns.
+    """
+    async def _conditional_get(
+        request: Request,
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        current_user: models.User = Depends(get_current_active_user_async),
+        db: AsyncSession = Depends(get_async_read_db)
+    ) -> str:
+        version = await get_collection_version_async(db, current_user.id, collection)
+        etag = make_etag(version, current_user.id, request)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+        return etag
+    return _conditional_get
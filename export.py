@@ -0,0 +1,111 @@
+# export.py - Streaming NDJSON / CSV export of a user's history
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Callable, Iterator, List, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import models
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # rows fetched (and written) per batch
+
+# Exportable collections, in export order
+EXPORT_COLLECTIONS = {
+    "activities": models.Activity,
+    "nutrition": models.NutritionEntry,
+    "sleep": models.SleepEntry,
+    "mood": models.MoodEntry,
+    "meditation": models.MeditationEntry,
+    "hydration": models.HydrationEntry,
+}
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+def _iter_batches(db: Session, model, user_id: int, batch_size: int) -> Iterator[Sequence]:
+    """Rows of one collection as plain tuples, batch_size at a time.
+
+    yield_per streams from a server-side cursor where the driver supports
+    it, so neither the database result nor ORM objects are held in memory.
+    """
+    columns = model.__table__.columns
+    statement = (
+        select(*columns)
+        .where(columns.user_id == user_id)
+        .order_by(columns.date, columns.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = db.execute(statement)
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+def iter_ndjson(
+    session_factory: Callable[[], Session],
+    user_id: int,
+    collections: List[str],
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """One JSON object per line, tagged with its collection as "type"."""
+    db = session_factory()
+    try:
+        for collection in collections:
+            model = EXPORT_COLLECTIONS[collection]
+            keys = ["type"] + [column.key for column in model.__table__.columns]
+            for batch in _iter_batches(db, model, user_id, batch_size):
+                yield "".join(
+                    json.dumps(dict(zip(keys, (collection, *row))), default=_json_default) + "\n"
+                    for row in batch
+                )
+    finally:
+        db.close()
+
+def iter_csv(
+    session_factory: Callable[[], Session],
+    user_id: int,
+    collections: List[str],
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """CSV with a "type" column followed by the union of the collections' columns.
+
+    Columns a collection does not have are left empty.
+    """
+    header = ["type"]
+    for collection in collections:
+        for column in EXPORT_COLLECTIONS[collection].__table__.columns:
+            if column.key not in header:
+                header.append(column.key)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue()
+
+    db = session_factory()
+    try:
+        for collection in collections:
+            model = EXPORT_COLLECTIONS[collection]
+            positions = [header.index(column.key) for column in model.__table__.columns]
+            for batch in _iter_batches(db, model, user_id, batch_size):
+                buffer.seek(0)
+                buffer.truncate()
+                for row in batch:
+                    line = [""] * len(header)
+                    line[0] = collection
+                    for position, value in zip(positions, row):
+                        line[position] = value.isoformat() if isinstance(value, (date, datetime)) else value
+                    writer.writerow(line)
+                yield buffer.getvalue()
+    finally:
+        db.close()
@@ -0,0 +1,177 @@
+# goals.py - Goal progress derived from the user's activities
+#
+# Goals with a tracked goal_type (GOAL_METRICS) get current_value from the
+# activities inside the goal window (day of creation .. target_date), kept
+# current on every activity write and completed once the target is reached.
+# Other goal types keep the current_value clients set via PUT /goals/{id}.
+# Re-evaluate every active goal offline (after upgrading, or after loading
+# data outside the API) with:
+#   python goals.py [--user-id N]
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import analytics
+import models
+from etags import bump_collection_version
+from stats import ActivitySnapshot
+
+STREAK = "streak"
+
+# goal_type (case-insensitive) -> daily_rollups column summed over the
+# window, or STREAK for the longest run of active days in the window
+GOAL_METRICS = {
+    "total_calories": "calories_out",
+    "calories": "calories_out",
+    "total_minutes": "activity_minutes",
+    "minutes": "activity_minutes",
+    "duration": "activity_minutes",
+    "sessions": "activity_count",
+    "activities": "activity_count",
+    "streak": STREAK,
+}
+
+def _contribution(metric: str, snapshot: ActivitySnapshot) -> int:
+    """How much one activity adds to a summed rollup column"""
+    if metric == "calories_out":
+        return snapshot.calories
+    if metric == "activity_minutes":
+        return snapshot.duration
+    return 1
+
+def goal_metric(goal_type: Optional[str]) -> Optional[str]:
+    """Rollup column (or STREAK) a goal type is measured by; None if untracked"""
+    return GOAL_METRICS.get((goal_type or "").strip().lower())
+
+def goal_window(goal: models.Goal) -> Tuple[date, Optional[date]]:
+    """Inclusive day range a goal counts activities in (open-ended without target_date)"""
+    start = (goal.created_at or datetime.utcnow()).date()
+    end = goal.target_date.date() if goal.target_date else None
+    return start, end
+
+def _in_window(day: Optional[date], start: date, end: Optional[date]) -> bool:
+    return day is not None and day >= start and (end is None or day <= end)
+
+def evaluate_goal(db: Session, goal: models.Goal) -> float:
+    """Progress of a tracked goal computed from daily_rollups over its window.
+
+    Reads at most one rollup row per day of the window, never the raw
+    activities.
+    """
+    metric = goal_metric(goal.goal_type)
+    start, end = goal_window(goal)
+    filters = [models.DailyRollup.user_id == goal.user_id, models.DailyRollup.day >= start]
+    if end is not None:
+        filters.append(models.DailyRollup.day <= end)
+
+    if metric == STREAK:
+        days = [row[0] for row in db.query(models.DailyRollup.day).filter(
+            *filters, models.DailyRollup.activity_count > 0
+        ).order_by(models.DailyRollup.day)]
+        return float(analytics.streaks(analytics.day_ordinals(days))["longest_streak"])
+
+    total = db.query(func.coalesce(func.sum(getattr(models.DailyRollup, metric)), 0)).filter(*filters).scalar()
+    return float(total or 0)
+
+def _set_progress(goal: models.Goal, value: float) -> bool:
+    """Store progress and complete the goal at target; True if anything changed"""
+    changed = goal.current_value != value
+    goal.current_value = value
+    if goal.status == "active" and goal.target_value is not None and value >= goal.target_value:
+        goal.status = "completed"
+        changed = True
+    return changed
+
+def sync_goal(db: Session, goal: models.Goal) -> bool:
+    """Recompute an active tracked goal after it was created or edited.
+
+    Untracked or inactive goals are left as they are. Returns True if the
+    goal changed.
+    """
+    # Flush first: a new goal only gets its default status (and created_at,
+    # which starts its window) on insert
+    db.flush()
+    if goal.status != "active" or goal_metric(goal.goal_type) is None:
+        return False
+    return _set_progress(goal, evaluate_goal(db, goal))
+
+def _active_tracked_goals(db: Session, user_id: Optional[int] = None) -> List[models.Goal]:
+    query = db.query(models.Goal).filter(models.Goal.status == "active")
+    if user_id is not None:
+        query = query.filter(models.Goal.user_id == user_id)
+    return [goal for goal in query if goal_metric(goal.goal_type) is not None]
+
+def apply_activity_to_goals(
+    db: Session,
+    user_id: int,
+    removed: Optional[ActivitySnapshot] = None,
+    added: Optional[ActivitySnapshot] = None
+) -> List[models.Goal]:
+    """Apply a single activity add/update/delete to the user's active goals.
+
+    Call after refresh_daily_rollups and before committing, so goals move
+    in the same transaction as the activity. Sum goals are adjusted by the
+    activity's own values with an atomic UPDATE; streak goals are re-evaluated over their window
+    when the activity falls inside it. Returns the goals that changed.
+    """
+    changed = []
+    for goal in _active_tracked_goals(db, user_id):
+        metric = goal_metric(goal.goal_type)
+        start, end = goal_window(goal)
+        removed_here = removed is not None and _in_window(removed.day, start, end)
+        added_here = added is not None and _in_window(added.day, start, end)
+        if not (removed_here or added_here):
+            continue
+
+        if metric == STREAK:
+            if _set_progress(goal, evaluate_goal(db, goal)):
+                changed.append(goal)
+            continue
+
+        delta = 0
+        if removed_here:
+            delta -= _contribution(metric, removed)
+        if added_here:
+            delta += _contribution(metric, added)
+        # Adjust in SQL under the row lock, so concurrent writes of the same
+        # user cannot overwrite each other's contribution
+        db.query(models.Goal).filter(models.Goal.id == goal.id).update(
+            {models.Goal.current_value: func.coalesce(models.Goal.current_value, 0.0) + delta},
+            synchronize_session=False
+        )
+        db.refresh(goal, ["current_value"])
+        if _set_progress(goal, goal.current_value) or delta:
+            changed.append(goal)
+
+    if changed:
+        bump_collection_version(db, user_id, "goals")
+    return changed
+
+def refresh_goals(db: Session, user_id: Optional[int] = None) -> int:
+    """Re-evaluate every active tracked goal of a user (or everyone).
+
+    Used after bulk imports, where per-activity deltas would cost more than
+    one windowed rollup read per goal. Does not commit. Returns the number
+    of goals that changed.
+    """
+    changed = [goal for goal in _active_tracked_goals(db, user_id) if _set_progress(goal, evaluate_goal(db, goal))]
+    for changed_user_id in {goal.user_id for goal in changed}:
+        bump_collection_version(db, changed_user_id, "goals")
+    return len(changed)
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Re-evaluate active goals from the daily rollups")
+    parser.add_argument("--user-id", type=int, help="only re-evaluate this user's goals")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        changed = refresh_goals(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Updated {changed} goals")
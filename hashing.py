@@ -0,0 +1,89 @@
+# hashing.py - Bounded worker pool for CPU-heavy password hashing
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 16)))
+
+class PoolSaturated(Exception):
+    """Raised when a job is submitted while the pool's queue is full"""
+
+class HashingPool:
+    """Thread pool with a queue-depth limit and timing counters.
+
+    bcrypt releases the GIL while hashing, so plain threads spread the work
+    over all cores. Jobs beyond max_pending (running + queued) are rejected
+    immediately instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def _run(self, fn: Callable, args: tuple, queued_at: float) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_wait += started - queued_at
+                self.total_run += finished - started
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.pending} password hashing jobs pending")
+            self.pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return self._executor.submit(self._run, fn, args, time.perf_counter())
+        except RuntimeError:
+            with self._lock:
+                self.pending -= 1
+            raise
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Run a job on the pool and wait for its result (for sync callers)"""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args) -> Any:
+        """Run a job on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": self.total_wait * 1000 / self.completed if self.completed else 0.0,
+                "avg_run_ms": self.total_run * 1000 / self.completed if self.completed else 0.0
+            }
+
+# Shared pool for bcrypt hashing and verification
+password_pool = HashingPool()
@@ -1,26 +1,70 @@
 # main.py - Enhanced version with terms & conditions and auth token system
-from fastapi import FastAPI, Depends, HTTPException, status, Query, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Header, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, desc, select, update
 from database import SessionLocal, engine
 import models, schemas
 from datetime import timedelta, datetime, date
 from typing import List, Optional
-import secrets
 import hashlib
+import asyncio
+import logging
 from auth import (
     get_password_hash, 
     verify_password, 
+    get_password_hash_async,
+    verify_and_update_password_async,
     create_access_token,
     create_refresh_token,
     verify_token,
     get_current_user,
     get_current_active_user,
+    get_current_active_user_async,
+    get_async_db,
+    invalidate_principal,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     security
 )
+from stats import (
+    get_or_create_user_stats,
+    rebuild_user_stats,
+    apply_activity_delta,
+    activity_window_summaries,
+    snapshot_activity,
+    read_user_stats,
+    wellness_summary_statement,
+    build_wellness_summary
+)
+from migrations import run_migrations
+from cache import dashboard_cache, principal_cache
+from hashing import password_pool
+from audit import audit_writer, audit_event
+from replica import (
+    get_read_db,
+    get_async_read_db,
+    read_router,
+    recent_writers,
+    sign_last_write,
+    last_write_from,
+    READ_METHODS,
+    READ_YOUR_WRITES_SECONDS,
+    LAST_WRITE_COOKIE,
+    LAST_WRITE_HEADER
+)
+from tokens import create_token_store, AUTH_TOKEN_TTL_SECONDS, AUTH_TOKEN_PURGE_INTERVAL_SECONDS
+from etags import conditional_get, bump_collection_version
+from pagination import paginate, paginate_async, NEXT_CURSOR_HEADER
+from rollups import refresh_daily_rollups, fill_daily_series
+from trends import activity_trends_statement
+from goals import apply_activity_to_goals, refresh_goals, sync_goal
+from analytics import active_days_statement, split_active_days, analyze
+from export import EXPORT_COLLECTIONS, EXPORT_MEDIA_TYPES, iter_ndjson, iter_csv
+from bulk import BulkResult, iter_records, validate_record, insert_chunk, BULK_CHUNK_SIZE, BULK_MAX_ROWS
 from enum import Enum
 import json
 from typing import Dict, Any
@@ -114,6 +158,9 @@ ROLE_PERMISSIONS: Dict[UserRole, List[Permission]] = {
 }
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Activity Tracker API", 
@@ -150,10 +197,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["ETag", NEXT_CURSOR_HEADER, LAST_WRITE_HEADER],
 )
 
-# In-memory store for auth tokens (in production, use Redis or database)
-auth_tokens = {}
+async def track_user_writes(request: Request, call_next):
+    """Start the read-your-writes window for users whose write succeeded.
+
+    Besides this process's RecentWriters, the client gets a signed
+    last_write marker (cookie and X-Last-Write header) so reads that land
+    on another worker also stay on the primary.
+    """
+    response = await call_next(request)
+    if request.method not in READ_METHODS and response.status_code < 400:
+        user_id = getattr(request.state, "user_id", None)
+        if user_id is not None:
+            recent_writers.mark(user_id)
+            marker = sign_last_write(user_id)
+            response.headers[LAST_WRITE_HEADER] = marker
+            response.set_cookie(
+                LAST_WRITE_COOKIE, marker,
+                max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax"
+            )
+    return response
+
+# Only needed when read-only endpoints are routed to a replica
+if read_router.enabled:
+    app.middleware("http")(track_user_writes)
+
+# Store for terms-acceptance auth tokens (AUTH_TOKEN_STORE=database|memory|signed)
+auth_tokens = create_token_store()
 
 # Terms and Conditions text
 TERMS_AND_CONDITIONS = """
@@ -194,12 +266,12 @@ Last Updated: July 14, 2025
 """
 
 def generate_auth_token():
-    """Generate a secure auth token"""
-    return secrets.token_urlsafe(32)
+    """Issue a new auth token from the configured token store"""
+    return auth_tokens.issue(AUTH_TOKEN_TTL_SECONDS)
 
 def verify_auth_token(token: str) -> bool:
     """Verify if auth token is valid"""
-    return token in auth_tokens and auth_tokens[token]["valid"]
+    return auth_tokens.is_valid(token)
 
 def get_auth_token_from_header(x_auth_token: Optional[str] = Header(None)):
     """Dependency to extract and validate auth token from headers"""
@@ -243,9 +315,12 @@ def has_permission(user_role: UserRole, required_permission: Permission) -> bool
     """Check if a role has a specific permission"""
     return required_permission in ROLE_PERMISSIONS[user_role]
 
-def permission_required(required_permissions: List[Permission]):
-    """Updated dependency factory for permission-based access control"""
-    def check_permission(current_user: models.User = Depends(get_current_active_user)):
+def permission_required(required_permissions: List[Permission], user_dependency=get_current_active_user):
+    """Updated dependency factory for permission-based access control.
+
+    Async endpoints pass get_current_active_user_async as user_dependency.
+    """
+    async def check_permission(current_user: models.User = Depends(user_dependency)):
         user_role = UserRole(current_user.role)
         
         for permission in required_permissions:
@@ -258,100 +333,16 @@ def permission_required(required_permissions: List[Permission]):
     return check_permission
 
 def log_user_action(db: Session, user_id: int, action: str, details: str = None):
-    """Log user actions for audit trail"""
-    audit_log = models.AuditLog(
-        user_id=user_id,
-        action=action,
-        details=details,
-        timestamp=datetime.now()
-    )
-    db.add(audit_log)
-    db.commit()
-def calculate_user_stats(user_id: int, db: Session):
-    """Calculate and update user statistics"""
-    activities = db.query(models.Activity).filter(models.Activity.user_id == user_id).all()
-    
-    if not activities:
-        return {
-            "total_activities": 0,
-           # "total_distance": 0.0,
-            "total_calories": 0,
-            "total_duration": 0,
-            "avg_calories_per_day": 0.0,
-            "current_streak": 0,
-            "longest_streak": 0,
-            "last_activity_date": None
-        }
-    
-    total_activities = len(activities)
-    #total_distance = sum(a.distance or 0 for a in activities)
-    total_calories = sum(a.calories_burned or 0 for a in activities)
-    total_duration = sum(a.duration or 0 for a in activities)
-    
-    # Calculate average calories per day
-    if activities:
-        first_activity = min(activities, key=lambda x: x.date)
-        days_active = (datetime.now() - first_activity.date).days + 1
-        avg_calories_per_day = total_calories / days_active if days_active > 0 else 0
-    else:
-        avg_calories_per_day = 0
-    
-    # Calculate streaks (simplified - consecutive days with activities)
-    activity_dates = sorted(set(a.date.date() for a in activities))
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 1
-    
-    if activity_dates:
-        for i in range(len(activity_dates) - 1):
-            if (activity_dates[i + 1] - activity_dates[i]).days == 1:
-                temp_streak += 1
-            else:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 1
-        longest_streak = max(longest_streak, temp_streak)
-        
-        # Current streak (from today backwards)
-        today = date.today()
-        if activity_dates and activity_dates[-1] == today:
-            current_streak = 1
-            for i in range(len(activity_dates) - 2, -1, -1):
-                if (activity_dates[i + 1] - activity_dates[i]).days == 1:
-                    current_streak += 1
-                else:
-                    break
-    
-    last_activity_date = max(activities, key=lambda x: x.date).date if activities else None
-    
-    return {
-        "total_activities": total_activities,
-        #"total_distance": total_distance,
-        "total_calories": total_calories,
-        "total_duration": total_duration,
-        "avg_calories_per_day": avg_calories_per_day,
-        "current_streak": current_streak,
-        "longest_streak": longest_streak,
-        "last_activity_date": last_activity_date
-    }
+    """Log user actions for audit trail.
 
-def get_or_create_user_stats(user_id: int, db: Session):
-    """Get or create user stats record"""
-    user_stats = db.query(models.UserStats).filter(models.UserStats.user_id == user_id).first()
-    
-    if not user_stats:
-        user_stats = models.UserStats(user_id=user_id)
-        db.add(user_stats)
-        db.commit()
-        db.refresh(user_stats)
-    
-    # Update stats
-    stats_data = calculate_user_stats(user_id, db)
-    for key, value in stats_data.items():
-        setattr(user_stats, key, value)
-    
-    db.commit()
-    db.refresh(user_stats)
-    return user_stats
+    Queued for the background audit writer, so it neither commits db nor
+    adds a transaction to the request.
+    """
+    audit_writer.enqueue(audit_event(user_id, action, details=details, timestamp=datetime.now()))
+
+async def log_user_action_async(user_id: int, action: str, details: str = None):
+    """log_user_action() for async handlers: queues without blocking the event loop"""
+    await audit_writer.enqueue_async(audit_event(user_id, action, details=details, timestamp=datetime.now()))
 
 @app.get("/")
 def root():
@@ -369,19 +360,13 @@ def get_terms():
 @app.post("/terms/agree")
 def agree_to_terms():
     """Agree to terms and conditions and receive auth token"""
+    # Expires in AUTH_TOKEN_TTL_SECONDS (1 hour by default)
     auth_token = generate_auth_token()
     
-    # Store token with timestamp (expires in 1 hour)
-    auth_tokens[auth_token] = {
-        "valid": True,
-        "created_at": datetime.now(),
-        "expires_at": datetime.now() + timedelta(hours=1)
-    }
-    
     return {
         "message": "Terms and conditions accepted successfully",
         "auth_token": auth_token,
-        "expires_in": 3600,  # 1 hour in seconds
+        "expires_in": AUTH_TOKEN_TTL_SECONDS,
         "note": "Use this auth token in the X-Auth-Token header for login/register"
     }
 
@@ -395,20 +380,26 @@ def check_terms_status(auth_token: str = Depends(get_auth_token_from_header)):
     }
 
 @app.post("/login", response_model=schemas.Token)
-def authenticate_user(
+async def authenticate_user(
     user: schemas.UserLogin, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     auth_token: str = Depends(get_auth_token_from_header)
 ):
     """Login endpoint - Returns JWT with fixed role permissions"""
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    db_user = await db.scalar(select(models.User).where(models.User.username == user.username))
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
         )
     
-    if not verify_password(user.password, db_user.hashed_password):
+    # End the read transaction so no pooled connection is held while the
+    # hash is verified on the password pool
+    db.expunge(db_user)
+    await db.rollback()
+    
+    valid, new_hash = await verify_and_update_password_async(user.password, db_user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
@@ -420,9 +411,16 @@ def authenticate_user(
             detail="Inactive user account"
         )
     
+    # Upgrade (or downgrade) hashes made with a different BCRYPT_ROUNDS
+    if new_hash:
+        await db.execute(
+            update(models.User).where(models.User.id == db_user.id).values(hashed_password=new_hash)
+        )
+        await db.commit()
+        db_user.hashed_password = new_hash
+    
     # Invalidate the auth token after successful login
-    #if auth_token in auth_tokens:
-        #auth_tokens[auth_token]["valid"] = False
+    #auth_tokens.revoke(auth_token)
     
     # Get fixed permissions for user's role
     user_role = UserRole(db_user.role)
@@ -440,7 +438,7 @@ def authenticate_user(
     refresh_token = create_refresh_token(data={"sub": db_user.username})
     
     # Log login action
-    log_user_action(db, db_user.id, "LOGIN", f"User logged in with role: {db_user.role}")
+    await log_user_action_async(db_user.id, "LOGIN", f"User logged in with role: {db_user.role}")
     
     return {
         "access_token": access_token,
@@ -451,13 +449,13 @@ def authenticate_user(
     }
 
 @app.post("/register")
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db), auth_token: str = Depends(get_auth_token_from_header)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db), auth_token: str = Depends(get_auth_token_from_header)):
     try:
         # Check if user already exists
-        existing_user = db.query(models.User).filter(
+        existing_user = await db.scalar(select(models.User.id).where(
             (models.User.username == user_data.username) | 
             (models.User.email == user_data.email)
-        ).first()
+        ).limit(1))
         
         if existing_user:
             raise HTTPException(
@@ -474,8 +472,9 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db), au
                 detail=f"Invalid role. Must be one of: {[r.value for r in UserRole]}"
             )
         
-        # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        # Hash the password (release the connection while it runs on the pool)
+        await db.rollback()
+        hashed_password = await get_password_hash_async(user_data.password)
         
         # Create new user with fixed role permissions
         new_user = models.User(
@@ -489,8 +488,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db), au
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
         
         # Get the fixed permissions for this role
         role_permissions = get_role_permissions(role)
@@ -506,7 +504,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db), au
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 @app.post("/auth/logout")
@@ -515,7 +513,7 @@ def logout_user(current_user: models.User = Depends(get_current_active_user)):
     return {"message": f"User {current_user.username} logged out successfully"}
 
 @app.get("/auth/me", response_model=schemas.UserOut)
-def get_current_user_info(current_user: models.User = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: models.User = Depends(get_current_active_user_async)):
     """Get current user information with their fixed role permissions"""
     user_role = UserRole(current_user.role)
     user_permissions = get_role_permissions(user_role)
@@ -566,230 +564,55 @@ def refresh_token(token_data: schemas.TokenRefresh, db: Session = Depends(get_db
 
 # Dashboard Endpoint
 @app.get("/dashboard", response_model=schemas.DashboardData)
-def get_dashboard(
-    current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_dashboard(
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get complete dashboard data for the authenticated user"""
+    cached = dashboard_cache.get(current_user.id, "dashboard")
+    if cached is not None:
+        return cached
     
     # Get recent activities (last 10)
-    recent_activities = db.query(models.Activity).filter(
-        models.Activity.user_id == current_user.id
-    ).order_by(desc(models.Activity.date)).limit(10).all()
+    recent_activities = (await read_db.scalars(
+        select(models.Activity).where(
+            models.Activity.user_id == current_user.id
+        ).order_by(desc(models.Activity.date)).limit(10)
+    )).all()
     
     # Get active goals
-    active_goals = db.query(models.Goal).filter(
-        models.Goal.user_id == current_user.id,
-        models.Goal.status == "active"
-    ).all()
-    
-    # Get or update user stats
-    user_stats = get_or_create_user_stats(current_user.id, db)
-    
-    # Calculate weekly summary (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    weekly_activities = db.query(models.Activity).filter(
-        models.Activity.user_id == current_user.id,
-        models.Activity.date >= week_ago
-    ).all()
-    
-    weekly_summary = {
-        "activities_count": len(weekly_activities),
-        #"total_distance": sum(a.distance or 0 for a in weekly_activities),
-        "total_calories": sum(a.calories_burned or 0 for a in weekly_activities),
-        "total_duration": sum(a.duration or 0 for a in weekly_activities),
-        "activity_types": list(set(a.activity_type for a in weekly_activities))
-    }
+    active_goals = (await read_db.scalars(
+        select(models.Goal).where(
+            models.Goal.user_id == current_user.id,
+            models.Goal.status == "active"
+        )
+    )).all()
     
-    # Calculate monthly summary (last 30 days)
-    month_ago = datetime.now() - timedelta(days=30)
-    monthly_activities = db.query(models.Activity).filter(
-        models.Activity.user_id == current_user.id,
-        models.Activity.date >= month_ago
-    ).all()
-    
-    monthly_summary = {
-        "activities_count": len(monthly_activities),
-        #"total_distance": sum(a.distance or 0 for a in monthly_activities),
-        "total_calories": sum(a.calories_burned or 0 for a in monthly_activities),
-        "total_duration": sum(a.duration or 0 for a in monthly_activities),
-        "activity_types": list(set(a.activity_type for a in monthly_activities))
-    }
+    # Get user stats (the primary creates or rebuilds the row if needed)
+    user_stats = await read_db.run_sync(lambda session: read_user_stats(current_user.id, session))
+    if user_stats is None:
+        user_stats = await db.run_sync(lambda session: get_or_create_user_stats(current_user.id, session))
     
-    return {
+    # Weekly (last 7 days) and monthly (last 30 days) summaries in one query
+    summaries = await read_db.run_sync(
+        lambda session: activity_window_summaries(current_user.id, session, windows=(7, 30))
+    )
+    weekly_summary = summaries[7]
+    monthly_summary = summaries[30]
+    
+    dashboard = schemas.DashboardData.model_validate({
         "user": current_user,
         "recent_activities": recent_activities,
         "active_goals": active_goals,
         "user_stats": user_stats,
         "weekly_summary": weekly_summary,
         "monthly_summary": monthly_summary
-    }
+    }, from_attributes=True)
+    dashboard_cache.set(current_user.id, "dashboard", dashboard)
+    return dashboard
 
 # Activity Endpoints
-def get_or_create_user_stats(user_id: int, db: Session):
-    """Get or create user stats record with proper error handling"""
-    try:
-        user_stats = db.query(models.UserStats).filter(models.UserStats.user_id == user_id).first()
-    except ValueError as e:
-        # Handle date parsing errors by recreating the stats record
-        if "Invalid isoformat string" in str(e):
-            # Delete the corrupted stats record
-            db.query(models.UserStats).filter(models.UserStats.user_id == user_id).delete(synchronize_session=False)
-            db.commit()
-            user_stats = None
-        else:
-            raise e
-    
-    if not user_stats:
-        # Create new stats record
-        user_stats = models.UserStats(user_id=user_id)
-        db.add(user_stats)
-        db.commit()
-        db.refresh(user_stats)
-    
-    # Update stats with proper error handling
-    try:
-        stats_data = calculate_user_stats(user_id, db)
-        for key, value in stats_data.items():
-            # Handle date fields properly
-            if key == "last_activity_date" and value is not None:
-                # Ensure it's a proper date object
-                if isinstance(value, str):
-                    try:
-                        value = datetime.strptime(value.split()[0], "%Y-%m-%d").date()
-                    except (ValueError, IndexError):
-                        value = None
-            setattr(user_stats, key, value)
-        
-        db.commit()
-        db.refresh(user_stats)
-    except Exception as e:
-        db.rollback()
-        # If there's still an error, return basic stats
-        user_stats = models.UserStats(
-            user_id=user_id,
-            total_activities=0,
-            #total_distance=0.0,
-            total_calories=0,
-            total_duration=0,
-            avg_calories_per_day=0.0,
-            current_streak=0,
-            longest_streak=0,
-            last_activity_date=None
-        )
-        db.add(user_stats)
-        db.commit()
-        db.refresh(user_stats)
-    
-    return user_stats
-
-def calculate_user_stats(user_id: int, db: Session):
-    """Calculate and update user statistics with proper date handling"""
-    try:
-        activities = db.query(models.Activity).filter(models.Activity.user_id == user_id).all()
-    except Exception as e:
-        # If there's an error querying activities, return empty stats
-        return {
-            "total_activities": 0,
-            #"total_distance": 0.0,
-            "total_calories": 0,
-            "total_duration": 0,
-            "avg_calories_per_day": 0.0,
-            "current_streak": 0,
-            "longest_streak": 0,
-            "last_activity_date": None
-        }
-    
-    if not activities:
-        return {
-            "total_activities": 0,
-            #"total_distance": 0.0,
-            "total_calories": 0,
-            "total_duration": 0,
-            "avg_calories_per_day": 0.0,
-            "current_streak": 0,
-            "longest_streak": 0,
-            "last_activity_date": None
-        }
-    
-    total_activities = len(activities)
-    #total_distance = sum(a.distance or 0 for a in activities)
-    total_calories = sum(a.calories_burned or 0 for a in activities)
-    total_duration = sum(a.duration or 0 for a in activities)
-    
-    # Calculate average calories per day
-    if activities:
-        first_activity = min(activities, key=lambda x: x.date)
-        # Handle date properly
-        if hasattr(first_activity.date, 'date'):
-            first_date = first_activity.date.date()
-        else:
-            first_date = first_activity.date
-        
-        days_active = (date.today() - first_date).days + 1
-        avg_calories_per_day = total_calories / days_active if days_active > 0 else 0
-    else:
-        avg_calories_per_day = 0
-    
-    # Calculate streaks (simplified - consecutive days with activities)
-    try:
-        activity_dates = []
-        for a in activities:
-            if hasattr(a.date, 'date'):
-                activity_dates.append(a.date.date())
-            else:
-                activity_dates.append(a.date)
-        
-        activity_dates = sorted(set(activity_dates))
-    except Exception:
-        activity_dates = []
-    
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 1
-    
-    if activity_dates:
-        for i in range(len(activity_dates) - 1):
-            if (activity_dates[i + 1] - activity_dates[i]).days == 1:
-                temp_streak += 1
-            else:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 1
-        longest_streak = max(longest_streak, temp_streak)
-        
-        # Current streak (from today backwards)
-        today = date.today()
-        if activity_dates and activity_dates[-1] == today:
-            current_streak = 1
-            for i in range(len(activity_dates) - 2, -1, -1):
-                if (activity_dates[i + 1] - activity_dates[i]).days == 1:
-                    current_streak += 1
-                else:
-                    break
-    
-    # Handle last activity date properly
-    last_activity_date = None
-    if activities:
-        try:
-            last_activity = max(activities, key=lambda x: x.date)
-            if hasattr(last_activity.date, 'date'):
-                last_activity_date = last_activity.date.date()
-            else:
-                last_activity_date = last_activity.date
-        except Exception:
-            last_activity_date = None
-    
-    return {
-        "total_activities": total_activities,
-        #"total_distance": total_distance,
-        "total_calories": total_calories,
-        "total_duration": total_duration,
-        "avg_calories_per_day": avg_calories_per_day,
-        "current_streak": current_streak,
-        "longest_streak": longest_streak,
-        "last_activity_date": last_activity_date
-    }
-
 @app.post("/activities", response_model=schemas.ActivityOut)
 def create_activity(
     activity: schemas.ActivityCreate,
@@ -804,16 +627,17 @@ def create_activity(
             **activity.dict()
         )
         db.add(db_activity)
-        db.commit()
-        db.refresh(db_activity)
+        db.flush()
         
-        # Update user stats with error handling
-        try:
-            get_or_create_user_stats(current_user.id, db)
-        except Exception as stats_error:
-            # Log the error but don't fail the activity creation
-            print(f"Warning: Failed to update user stats: {stats_error}")
+        # Update user stats in the same transaction as the activity
+        apply_activity_delta(current_user.id, db, added=snapshot_activity(db_activity))
         
+        bump_collection_version(db, current_user.id, "activities")
+        refresh_daily_rollups(db, current_user.id, [db_activity.date])
+        apply_activity_to_goals(db, current_user.id, added=snapshot_activity(db_activity))
+        db.commit()
+        db.refresh(db_activity)
+        dashboard_cache.invalidate(current_user.id)
         return db_activity
         
     except Exception as e:
@@ -823,52 +647,87 @@ def create_activity(
             detail=f"Failed to create activity: {str(e)}"
         )
 
-@app.get("/activities", response_model=List[schemas.ActivityOut])
-def get_activities(
-    skip: int = 0,
-    limit: int = 100,
-    activity_type: Optional[str] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    current_user: models.User = Depends(get_current_active_user),
+@app.post("/activities/bulk", response_model=schemas.BulkImportResult)
+async def bulk_create_activities(
+    request: Request,
+    current_user: models.User = Depends(get_current_active_user_async),
     db: Session = Depends(get_db)
 ):
-    """Get user's activities with optional filtering"""
-    query = db.query(models.Activity).filter(models.Activity.user_id == current_user.id)
+    """Import many activities from a JSON array or NDJSON stream.
+
+    Valid rows are inserted in chunked executemany transactions, each of
+    which also bumps the collection version and refreshes the rollups and
+    goals for its rows, so every committed chunk is consistent on its own.
+    Stats are rebuilt once at the end, even if the upload is cut off;
+    invalid rows are reported by index without aborting the rest of the
+    batch.
+    """
+    result = BulkResult()
+    table = models.Activity.__table__
+    chunk = []
     
-    if activity_type:
-        query = query.filter(models.Activity.activity_type == activity_type)
-    if start_date:
-        query = query.filter(models.Activity.date >= start_date)
-    if end_date:
-        query = query.filter(models.Activity.date <= end_date)
+    def chunk_committing(rows):
+        bump_collection_version(db, current_user.id, "activities")
+        refresh_daily_rollups(db, current_user.id, [values["date"] for values in rows])
+        refresh_goals(db, current_user.id)
     
-    activities = query.order_by(desc(models.Activity.date)).offset(skip).limit(limit).all()
-    return activities
+    try:
+        async for index, record, error in iter_records(request):
+            if result.received >= BULK_MAX_ROWS:
+                result.error(index, f"Row limit of {BULK_MAX_ROWS} per request exceeded; remaining rows ignored")
+                break
+            result.received += 1
+            
+            values = None
+            if error is None:
+                values, error = validate_record(schemas.ActivityCreate, record)
+            if error is not None:
+                result.error(index, error)
+                continue
+            
+            chunk.append((index, {"user_id": current_user.id, **values}))
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await run_in_threadpool(insert_chunk, db, table, chunk, result, chunk_committing)
+                chunk = []
+        
+        await run_in_threadpool(insert_chunk, db, table, chunk, result, chunk_committing)
+    finally:
+        if result.inserted:
+            def finish_import():
+                rebuild_user_stats(current_user.id, db)
+                log_user_action(db, current_user.id, "BULK_IMPORT_ACTIVITIES",
+                                f"Imported {result.inserted} activities ({result.failed} rejected)")
+            
+            await run_in_threadpool(finish_import)
+            dashboard_cache.invalidate(current_user.id)
+    
+    return result.as_dict()
 
 @app.get("/activities", response_model=List[schemas.ActivityOut])
-def get_activities(
+async def get_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    category: Optional[str] = None,  # Changed from activity_type to category
+    cursor: Optional[str] = None,
+    activity_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_active_user_async),
+    etag: str = Depends(conditional_get("activities")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get user's activities with optional filtering"""
-    query = db.query(models.Activity).filter(models.Activity.user_id == current_user.id)
+    """Get user's activities with optional filtering (offset or cursor pagination)"""
+    query = select(models.Activity).where(models.Activity.user_id == current_user.id)
     
-    if category:  # Updated filter
-        query = query.filter(models.Activity.category == category)
+    if activity_type:
+        query = query.where(models.Activity.activity_name == activity_type)
     if start_date:
-        query = query.filter(models.Activity.date >= start_date)
+        query = query.where(models.Activity.date >= start_date)
     if end_date:
-        query = query.filter(models.Activity.date <= end_date)
+        query = query.where(models.Activity.date <= end_date)
     
-    activities = query.order_by(desc(models.Activity.date)).offset(skip).limit(limit).all()
+    activities = await paginate_async(db, query, models.Activity.date, models.Activity.id, response, limit=limit, skip=skip, cursor=cursor)
     return activities
-    return activity
 
 @app.put("/activities/{activity_id}", response_model=schemas.ActivityOut)
 def update_activity(
@@ -886,16 +745,21 @@ def update_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    previous = snapshot_activity(activity)
     update_data = activity_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(activity, field, value)
-    
-    db.commit()
-    db.refresh(activity)
+    db.flush()
     
     # Update user stats
-    get_or_create_user_stats(current_user.id, db)
+    apply_activity_delta(current_user.id, db, removed=previous, added=snapshot_activity(activity))
+    bump_collection_version(db, current_user.id, "activities")
+    refresh_daily_rollups(db, current_user.id, [previous.day, activity.date])
+    apply_activity_to_goals(db, current_user.id, removed=previous, added=snapshot_activity(activity))
     
+    db.commit()
+    db.refresh(activity)
+    dashboard_cache.invalidate(current_user.id)
     return activity
 
 @app.delete("/activities/{activity_id}")
@@ -913,12 +777,18 @@ def delete_activity(
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
+    previous = snapshot_activity(activity)
     db.delete(activity)
-    db.commit()
+    db.flush()
     
     # Update user stats
-    get_or_create_user_stats(current_user.id, db)
+    apply_activity_delta(current_user.id, db, removed=previous)
+    bump_collection_version(db, current_user.id, "activities")
+    refresh_daily_rollups(db, current_user.id, [previous.day])
+    apply_activity_to_goals(db, current_user.id, removed=previous)
     
+    db.commit()
+    dashboard_cache.invalidate(current_user.id)
     return {"message": "Activity deleted successfully"}
 
 # Goal Endpoints
@@ -928,29 +798,33 @@ def create_goal(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new goal"""
+    """Create a new goal (tracked goal types start with their progress so far)"""
     db_goal = models.Goal(
         user_id=current_user.id,
         **goal.dict()
     )
     db.add(db_goal)
+    sync_goal(db, db_goal)
+    bump_collection_version(db, current_user.id, "goals")
     db.commit()
     db.refresh(db_goal)
+    dashboard_cache.invalidate(current_user.id)
     return db_goal
 
 @app.get("/goals", response_model=List[schemas.GoalOut])
-def get_goals(
+async def get_goals(
     status: Optional[str] = None,
-    current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_active_user_async),
+    etag: str = Depends(conditional_get("goals")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get user's goals"""
-    query = db.query(models.Goal).filter(models.Goal.user_id == current_user.id)
+    query = select(models.Goal).where(models.Goal.user_id == current_user.id)
     
     if status:
-        query = query.filter(models.Goal.status == status)
+        query = query.where(models.Goal.status == status)
     
-    goals = query.order_by(desc(models.Goal.created_at)).all()
+    goals = (await db.scalars(query.order_by(desc(models.Goal.created_at)))).all()
     return goals
 
 @app.put("/goals/{goal_id}", response_model=schemas.GoalOut)
@@ -960,7 +834,11 @@ def update_goal(
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Update a goal"""
+    """Update a goal.
+
+    current_value of tracked goal types (see goals.GOAL_METRICS) is derived
+    from activities, so it is recomputed rather than taken from the request.
+    """
     goal = db.query(models.Goal).filter(
         models.Goal.id == goal_id,
         models.Goal.user_id == current_user.id
@@ -972,9 +850,12 @@ def update_goal(
     update_data = goal_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(goal, field, value)
+    sync_goal(db, goal)
+    bump_collection_version(db, current_user.id, "goals")
     
     db.commit()
     db.refresh(goal)
+    dashboard_cache.invalidate(current_user.id)
     return goal
 
 # User Profile Endpoints
@@ -990,6 +871,9 @@ def update_profile(
     db: Session = Depends(get_db)
 ):
     """Update user profile"""
+    # current_user is bound to the auth session (or rebuilt from the principal
+    # cache), so load the row into this session before changing it
+    current_user = db.query(models.User).filter(models.User.id == current_user.id).first()
     update_data = profile_update.dict(exclude_unset=True)
     
     # Check for conflicts
@@ -1018,16 +902,38 @@ def update_profile(
     
     db.commit()
     db.refresh(current_user)
+    dashboard_cache.invalidate(current_user.id)
+    invalidate_principal(current_user.id)
     return current_user
 
 # Statistics Endpoint
 @app.get("/stats", response_model=schemas.UserStatsOut)
 def get_user_stats(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
 ):
     """Get user statistics"""
-    user_stats = get_or_create_user_stats(current_user.id, db)
+    cached = dashboard_cache.get(current_user.id, "stats")
+    if cached is not None:
+        return cached
+    
+    user_stats = read_user_stats(current_user.id, read_db) or get_or_create_user_stats(current_user.id, db)
+    user_stats = schemas.UserStatsOut.model_validate(user_stats, from_attributes=True)
+    dashboard_cache.set(current_user.id, "stats", user_stats)
+    return user_stats
+
+@app.post("/stats/rebuild", response_model=schemas.UserStatsOut)
+def rebuild_stats(
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute user statistics and goal progress from the activity history (repair)"""
+    user_stats = rebuild_user_stats(current_user.id, db)
+    if refresh_goals(db, current_user.id):
+        db.commit()
+        db.refresh(user_stats)
+    dashboard_cache.invalidate(current_user.id)
     return user_stats
 
 # Health and utility endpoints
@@ -1035,17 +941,50 @@ def get_user_stats(
 def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/metrics")
+def get_metrics(current_user: models.User = Depends(get_admin_user)):
+    """Get in-process cache and performance counters (Admin only)"""
+    return {
+        "dashboard_cache": dashboard_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "audit_writer": audit_writer.stats(),
+        "auth_tokens": auth_tokens.stats(),
+        "read_routing": read_router.stats()
+    }
+
 # Cleanup expired auth tokens (run periodically)
+async def purge_expired_tokens_periodically():
+    """Purge expired auth tokens every AUTH_TOKEN_PURGE_INTERVAL_SECONDS"""
+    while True:
+        try:
+            await run_in_threadpool(auth_tokens.purge_expired)
+        except Exception:
+            # Keep purging on later passes (e.g. after the database is back)
+            logger.exception("Failed to purge expired auth tokens")
+        await asyncio.sleep(AUTH_TOKEN_PURGE_INTERVAL_SECONDS)
+
 @app.on_event("startup")
 async def cleanup_expired_tokens():
-    """Clean up expired auth tokens on startup"""
-    current_time = datetime.now()
-    expired_tokens = [
-        token for token, data in auth_tokens.items() 
-        if data["expires_at"] < current_time
-    ]
-    for token in expired_tokens:
-        del auth_tokens[token]
+    """Start the periodic purge of expired auth tokens"""
+    app.state.token_purge_task = asyncio.create_task(purge_expired_tokens_periodically())
+
+@app.on_event("shutdown")
+async def stop_token_purge():
+    """Stop the periodic auth token purge"""
+    task = getattr(app.state, "token_purge_task", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    """Let in-flight password hashing jobs finish"""
+    password_pool.shutdown()
+
+@app.on_event("shutdown")
+def shutdown_audit_writer():
+    """Write every queued audit event before exiting"""
+    audit_writer.stop()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1178,6 +1117,8 @@ def update_exercise_tracker(
     
     db.commit()
     db.refresh(exercise_tracker)
+    dashboard_cache.invalidate(user_id)
+    invalidate_principal(user_id)
     
     # Log action
     log_user_action(db, current_user.id, "UPDATE_exercise_tracker", f"Updated sub-user: {exercise_tracker.username}")
@@ -1206,7 +1147,8 @@ def delete_exercise_tracker(
         log_user_action(db, current_user.id, "DELETE_exercise_tracker", f"Deleted sub-user: {username}")
         
         # Delete audit logs for this user first (or update them to reference the admin)
-        # Option 1: Delete audit logs for this user
+        # Option 1: Delete audit logs for this user (after queued events are written)
+        audit_writer.flush()
         db.query(models.AuditLog).filter(models.AuditLog.user_id == user_id).delete(synchronize_session=False)
         
         # Option 2: Alternative - Update audit logs to reference the admin who deleted the user
@@ -1219,10 +1161,14 @@ def delete_exercise_tracker(
         db.query(models.Activity).filter(models.Activity.user_id == user_id).delete(synchronize_session=False)
         db.query(models.Goal).filter(models.Goal.user_id == user_id).delete(synchronize_session=False)
         db.query(models.UserStats).filter(models.UserStats.user_id == user_id).delete(synchronize_session=False)
+        db.query(models.DailyRollup).filter(models.DailyRollup.user_id == user_id).delete(synchronize_session=False)
+        db.query(models.CollectionVersion).filter(models.CollectionVersion.user_id == user_id).delete(synchronize_session=False)
         
         # Delete user
         db.delete(exercise_tracker)
         db.commit()
+        dashboard_cache.invalidate(user_id)
+        invalidate_principal(user_id)
         
     except Exception as e:
         db.rollback()
@@ -1250,8 +1196,10 @@ def get_role_permissions_info(
 
 @app.get("/audit-logs", response_model=List[schemas.AuditLogOut])
 def get_audit_logs(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
     start_date: Optional[datetime] = None,
@@ -1260,6 +1208,8 @@ def get_audit_logs(
     current_user: models.User = Depends(get_admin_user)
 ):
     """Get audit logs (Admin only)"""
+    # Include events still waiting in the background writer
+    audit_writer.flush()
     query = db.query(models.AuditLog)
     
     if user_id:
@@ -1271,7 +1221,7 @@ def get_audit_logs(
     if end_date:
         query = query.filter(models.AuditLog.timestamp <= end_date)
     
-    logs = query.order_by(desc(models.AuditLog.timestamp)).offset(skip).limit(limit).all()
+    logs = paginate(query, models.AuditLog.timestamp, models.AuditLog.id, response, limit=limit, skip=skip, cursor=cursor)
     return logs
 @app.post("/wellness_trackers", response_model=schemas.UserOut)
 def create_wellness_tracker(
@@ -1398,6 +1348,8 @@ def update_wellness_tracker(
     
     db.commit()
     db.refresh(wellness_tracker)
+    dashboard_cache.invalidate(user_id)
+    invalidate_principal(user_id)
     
     # Log action
     log_user_action(db, current_user.id, "UPDATE_wellness_tracker", f"Updated wellness tracker: {wellness_tracker.username}")
@@ -1425,17 +1377,22 @@ def delete_wellness_tracker(
         # Log action BEFORE deleting
         log_user_action(db, current_user.id, "DELETE_wellness_tracker", f"Deleted wellness tracker: {username}")
         
-        # Delete audit logs for this user
+        # Delete audit logs for this user (after queued events are written)
+        audit_writer.flush()
         db.query(models.AuditLog).filter(models.AuditLog.user_id == user_id).delete(synchronize_session=False)
         
         # Delete related data
         db.query(models.Activity).filter(models.Activity.user_id == user_id).delete(synchronize_session=False)
         db.query(models.Goal).filter(models.Goal.user_id == user_id).delete(synchronize_session=False)
         db.query(models.UserStats).filter(models.UserStats.user_id == user_id).delete(synchronize_session=False)
+        db.query(models.DailyRollup).filter(models.DailyRollup.user_id == user_id).delete(synchronize_session=False)
+        db.query(models.CollectionVersion).filter(models.CollectionVersion.user_id == user_id).delete(synchronize_session=False)
         
         # Delete user
         db.delete(wellness_tracker)
         db.commit()
+        dashboard_cache.invalidate(user_id)
+        invalidate_principal(user_id)
         
     except Exception as e:
         db.rollback()
@@ -1486,8 +1443,11 @@ def track_nutrition(
         )
         
         db.add(new_nutrition)
+        bump_collection_version(db, current_user.id, "nutrition")
+        refresh_daily_rollups(db, current_user.id, [new_nutrition.date])
         db.commit()
         db.refresh(new_nutrition)
+        dashboard_cache.invalidate(current_user.id)
         
         # Log the action
         log_user_action(
@@ -1507,25 +1467,28 @@ def track_nutrition(
         )
 
 @app.get("/wellness/nutrition", response_model=List[schemas.NutritionOut])
-def get_nutrition_activities(
+async def get_nutrition_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(permission_required([Permission.TRACK_NUTRITION])),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(permission_required([Permission.TRACK_NUTRITION], get_current_active_user_async)),
+    etag: str = Depends(conditional_get("nutrition")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get nutrition entries for current user"""
-    query = db.query(models.NutritionEntry).filter(
+    query = select(models.NutritionEntry).where(
         models.NutritionEntry.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.NutritionEntry.date >= start_date)
+        query = query.where(models.NutritionEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.NutritionEntry.date <= end_date)
+        query = query.where(models.NutritionEntry.date <= end_date)
     
-    entries = query.order_by(models.NutritionEntry.date.desc()).offset(skip).limit(limit).all()
+    entries = await paginate_async(db, query, models.NutritionEntry.date, models.NutritionEntry.id, response, limit=limit, skip=skip, cursor=cursor)
     return entries
 
 @app.delete("/wellness/nutrition/{entry_id}")
@@ -1546,7 +1509,10 @@ def delete_nutrition_entry(
     try:
         log_user_action(db, current_user.id, "DELETE_NUTRITION", f"Deleted nutrition entry: {entry.food_items[:30]}")
         db.delete(entry)
+        bump_collection_version(db, current_user.id, "nutrition")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         db.commit()
+        dashboard_cache.invalidate(current_user.id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entry: {str(e)}")
@@ -1573,8 +1539,11 @@ def track_sleep(
         )
         
         db.add(new_sleep)
+        bump_collection_version(db, current_user.id, "sleep")
+        refresh_daily_rollups(db, current_user.id, [new_sleep.date])
         db.commit()
         db.refresh(new_sleep)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -1593,25 +1562,28 @@ def track_sleep(
         )
 
 @app.get("/wellness/sleep", response_model=List[schemas.SleepOut])
-def get_sleep_activities(
+async def get_sleep_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(permission_required([Permission.TRACK_SLEEP])),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(permission_required([Permission.TRACK_SLEEP], get_current_active_user_async)),
+    etag: str = Depends(conditional_get("sleep")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get sleep entries for current user"""
-    query = db.query(models.SleepEntry).filter(
+    query = select(models.SleepEntry).where(
         models.SleepEntry.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.SleepEntry.date >= start_date)
+        query = query.where(models.SleepEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.SleepEntry.date <= end_date)
+        query = query.where(models.SleepEntry.date <= end_date)
     
-    entries = query.order_by(models.SleepEntry.date.desc()).offset(skip).limit(limit).all()
+    entries = await paginate_async(db, query, models.SleepEntry.date, models.SleepEntry.id, response, limit=limit, skip=skip, cursor=cursor)
     return entries
 
 @app.delete("/wellness/sleep/{entry_id}")
@@ -1632,7 +1604,10 @@ def delete_sleep_entry(
     try:
         log_user_action(db, current_user.id, "DELETE_SLEEP", f"Deleted sleep entry: Quality {entry.sleep_quality}/10")
         db.delete(entry)
+        bump_collection_version(db, current_user.id, "sleep")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         db.commit()
+        dashboard_cache.invalidate(current_user.id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entry: {str(e)}")
@@ -1659,8 +1634,11 @@ def track_mood(
         )
         
         db.add(new_mood)
+        bump_collection_version(db, current_user.id, "mood")
+        refresh_daily_rollups(db, current_user.id, [new_mood.date])
         db.commit()
         db.refresh(new_mood)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -1679,25 +1657,28 @@ def track_mood(
         )
 
 @app.get("/wellness/mood", response_model=List[schemas.MoodOut])
-def get_mood_activities(
+async def get_mood_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(permission_required([Permission.TRACK_MOOD])),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(permission_required([Permission.TRACK_MOOD], get_current_active_user_async)),
+    etag: str = Depends(conditional_get("mood")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get mood entries for current user"""
-    query = db.query(models.MoodEntry).filter(
+    query = select(models.MoodEntry).where(
         models.MoodEntry.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.MoodEntry.date >= start_date)
+        query = query.where(models.MoodEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.MoodEntry.date <= end_date)
+        query = query.where(models.MoodEntry.date <= end_date)
     
-    entries = query.order_by(models.MoodEntry.date.desc()).offset(skip).limit(limit).all()
+    entries = await paginate_async(db, query, models.MoodEntry.date, models.MoodEntry.id, response, limit=limit, skip=skip, cursor=cursor)
     return entries
 
 @app.delete("/wellness/mood/{entry_id}")
@@ -1718,7 +1699,10 @@ def delete_mood_entry(
     try:
         log_user_action(db, current_user.id, "DELETE_MOOD", f"Deleted mood entry: {entry.mood_type}")
         db.delete(entry)
+        bump_collection_version(db, current_user.id, "mood")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         db.commit()
+        dashboard_cache.invalidate(current_user.id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entry: {str(e)}")
@@ -1743,8 +1727,11 @@ def track_meditation(
         )
         
         db.add(new_meditation)
+        bump_collection_version(db, current_user.id, "meditation")
+        refresh_daily_rollups(db, current_user.id, [new_meditation.date])
         db.commit()
         db.refresh(new_meditation)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -1763,25 +1750,28 @@ def track_meditation(
         )
 
 @app.get("/wellness/meditation", response_model=List[schemas.MeditationOut])
-def get_meditation_activities(
+async def get_meditation_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(permission_required([Permission.TRACK_MEDITATION])),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(permission_required([Permission.TRACK_MEDITATION], get_current_active_user_async)),
+    etag: str = Depends(conditional_get("meditation")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get meditation entries for current user"""
-    query = db.query(models.MeditationEntry).filter(
+    query = select(models.MeditationEntry).where(
         models.MeditationEntry.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.MeditationEntry.date >= start_date)
+        query = query.where(models.MeditationEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.MeditationEntry.date <= end_date)
+        query = query.where(models.MeditationEntry.date <= end_date)
     
-    entries = query.order_by(models.MeditationEntry.date.desc()).offset(skip).limit(limit).all()
+    entries = await paginate_async(db, query, models.MeditationEntry.date, models.MeditationEntry.id, response, limit=limit, skip=skip, cursor=cursor)
     return entries
 
 @app.delete("/wellness/meditation/{entry_id}")
@@ -1802,7 +1792,10 @@ def delete_meditation_entry(
     try:
         log_user_action(db, current_user.id, "DELETE_MEDITATION", f"Deleted meditation entry: {entry.meditation_type} - {entry.duration}min")
         db.delete(entry)
+        bump_collection_version(db, current_user.id, "meditation")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         db.commit()
+        dashboard_cache.invalidate(current_user.id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entry: {str(e)}")
@@ -1827,8 +1820,11 @@ def track_hydration(
         )
         
         db.add(new_hydration)
+        bump_collection_version(db, current_user.id, "hydration")
+        refresh_daily_rollups(db, current_user.id, [new_hydration.date])
         db.commit()
         db.refresh(new_hydration)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -1847,25 +1843,28 @@ def track_hydration(
         )
 
 @app.get("/wellness/hydration", response_model=List[schemas.HydrationOut])
-def get_hydration_activities(
+async def get_hydration_activities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: models.User = Depends(permission_required([Permission.TRACK_HYDRATION])),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(permission_required([Permission.TRACK_HYDRATION], get_current_active_user_async)),
+    etag: str = Depends(conditional_get("hydration")),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get hydration entries for current user"""
-    query = db.query(models.HydrationEntry).filter(
+    query = select(models.HydrationEntry).where(
         models.HydrationEntry.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.HydrationEntry.date >= start_date)
+        query = query.where(models.HydrationEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.HydrationEntry.date <= end_date)
+        query = query.where(models.HydrationEntry.date <= end_date)
     
-    entries = query.order_by(models.HydrationEntry.date.desc()).offset(skip).limit(limit).all()
+    entries = await paginate_async(db, query, models.HydrationEntry.date, models.HydrationEntry.id, response, limit=limit, skip=skip, cursor=cursor)
     return entries
 
 @app.delete("/wellness/hydration/{entry_id}")
@@ -1886,61 +1885,260 @@ def delete_hydration_entry(
     try:
         log_user_action(db, current_user.id, "DELETE_HYDRATION", f"Deleted hydration entry: {entry.water_intake}L")
         db.delete(entry)
+        bump_collection_version(db, current_user.id, "hydration")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         db.commit()
+        dashboard_cache.invalidate(current_user.id)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entry: {str(e)}")
     
     return {"message": "Hydration entry deleted successfully"}
 
-# DASHBOARD SUMMARY
-@app.get("/wellness/summary")
-def get_wellness_dashboard_summary(
-    days: int = 30,
-    current_user: models.User = Depends(get_current_user),
+# BULK WELLNESS INGESTION
+WELLNESS_BULK_TYPES = {
+    "nutrition": (models.NutritionEntry, Permission.TRACK_NUTRITION),
+    "sleep": (models.SleepEntry, Permission.TRACK_SLEEP),
+    "mood": (models.MoodEntry, Permission.TRACK_MOOD),
+    "meditation": (models.MeditationEntry, Permission.TRACK_MEDITATION),
+    "hydration": (models.HydrationEntry, Permission.TRACK_HYDRATION),
+}
+
+@app.post("/wellness/bulk", response_model=schemas.WellnessBulkResult)
+def track_wellness_bulk(
+    bulk_data: schemas.WellnessBulkCreate,
+    current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get wellness summary for dashboard"""
-    end_date = date.today()
-    start_date = end_date - timedelta(days=days)
+    """Track a mixed batch of wellness entries in one transaction.
+
+    Entries are validated by their *Create schema (selected by `type`), so an
+    invalid entry rejects the whole batch with 422. Rows are inserted with
+    one executemany per entry type and a single summary audit event is
+    logged.
+    """
+    if len(bulk_data.entries) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ROWS} entries per request"
+        )
     
-    # Get counts for each activity type
-    nutrition_count = db.query(models.NutritionEntry).filter(
-        models.NutritionEntry.user_id == current_user.id,
-        models.NutritionEntry.date >= start_date
-    ).count()
+    user_role = UserRole(current_user.role)
+    rows_by_type: Dict[str, list] = {}
+    today = date.today()
+    for entry in bulk_data.entries:
+        rows_by_type.setdefault(entry.type, []).append({
+            "user_id": current_user.id,
+            "date": entry.entry_date or today,
+            **entry.model_dump(exclude={"type", "entry_date"})
+        })
+    
+    for entry_type in rows_by_type:
+        permission = WELLNESS_BULK_TYPES[entry_type][1]
+        if not has_permission(user_role, permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission denied. Required: {permission.value}"
+            )
     
-    sleep_count = db.query(models.SleepEntry).filter(
-        models.SleepEntry.user_id == current_user.id,
-        models.SleepEntry.date >= start_date
-    ).count()
+    if not rows_by_type:
+        return {"inserted": 0, "by_type": {}}
     
-    mood_count = db.query(models.MoodEntry).filter(
-        models.MoodEntry.user_id == current_user.id,
-        models.MoodEntry.date >= start_date
-    ).count()
+    try:
+        for entry_type, rows in rows_by_type.items():
+            db.execute(WELLNESS_BULK_TYPES[entry_type][0].__table__.insert(), rows)
+            bump_collection_version(db, current_user.id, entry_type)
+        refresh_daily_rollups(db, current_user.id, [row["date"] for rows in rows_by_type.values() for row in rows])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to track wellness entries: {str(e)}"
+        )
+    dashboard_cache.invalidate(current_user.id)
     
-    meditation_count = db.query(models.MeditationEntry).filter(
-        models.MeditationEntry.user_id == current_user.id,
-        models.MeditationEntry.date >= start_date
-    ).count()
+    by_type = {entry_type: len(rows) for entry_type, rows in rows_by_type.items()}
+    log_user_action(
+        db,
+        current_user.id,
+        "BULK_TRACK_WELLNESS",
+        f"Tracked {len(bulk_data.entries)} wellness entries: "
+        + ", ".join(f"{entry_type}={count}" for entry_type, count in sorted(by_type.items()))
+    )
     
-    hydration_count = db.query(models.HydrationEntry).filter(
-        models.HydrationEntry.user_id == current_user.id,
-        models.HydrationEntry.date >= start_date
-    ).count()
+    return {"inserted": len(bulk_data.entries), "by_type": by_type}
+
+# DAILY TIME SERIES
+TIMESERIES_MAX_DAYS = 3660
+
+@app.get("/timeseries/daily", response_model=List[schemas.DailyRollupOut])
+async def get_daily_timeseries(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Daily activity and wellness totals, one entry per day (zeros for empty days).
+
+    Reads only the daily_rollups table, so a year is 365 rows regardless of
+    how many entries were logged. Defaults to the last 30 days.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end_date - start_date).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {TIMESERIES_MAX_DAYS} days")
+    
+    rows = (await db.scalars(
+        select(models.DailyRollup).where(
+            models.DailyRollup.user_id == current_user.id,
+            models.DailyRollup.day >= start_date,
+            models.DailyRollup.day <= end_date
+        )
+    )).all()
+    return fill_daily_series(rows, start_date, end_date)
+
+@app.get("/trends/activities", response_model=List[schemas.ActivityTrendOut])
+async def get_activity_trends(
+    bucket: str = Query("week", pattern="^(day|week|month)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    by_activity: bool = False,
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Activity count, calories and duration per day, ISO week or month.
+
+    Buckets are computed in SQL and identified by their first day (weeks
+    start on Monday), so the first and last buckets may cover only part of
+    the range; buckets without activities are omitted. by_activity splits
+    each bucket per activity_name. Defaults to the last 365 days.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=364)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end_date - start_date).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {TIMESERIES_MAX_DAYS} days")
+
+    result = await db.execute(
+        activity_trends_statement(current_user.id, bucket, start_date, end_date, split_by_activity=by_activity)
+    )
+    return [dict(row._mapping) for row in result]
+
+# DATA EXPORT
+EXPORT_PERMISSIONS = {
+    "activities": Permission.READ_ACTIVITIES,
+    **{entry_type: permission for entry_type, (_, permission) in WELLNESS_BULK_TYPES.items()}
+}
+
+def readable_collections(collections: Optional[str], user_role: UserRole) -> List[str]:
+    """Parse a comma-separated collections parameter, checking read permissions.
+
+    Defaults to every collection the role can read.
+    """
+    if not collections:
+        return [name for name in EXPORT_COLLECTIONS if has_permission(user_role, EXPORT_PERMISSIONS[name])]
     
+    requested = [name.strip() for name in collections.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in EXPORT_COLLECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown collections: {', '.join(unknown)} (expected {', '.join(EXPORT_COLLECTIONS)})"
+        )
+    for name in requested:
+        if not has_permission(user_role, EXPORT_PERMISSIONS[name]):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission denied. Required: {EXPORT_PERMISSIONS[name].value}"
+            )
+    return requested
+
+@app.get("/export")
+def export_history(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    collections: Optional[str] = Query(None, description="Comma-separated; defaults to every collection the role can read"),
+    user_id: Optional[int] = Query(None, description="Admin only: export another user's history"),
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a user's full activity and wellness history as NDJSON or CSV.
+
+    Rows are read in batches with yield_per and written as they are read,
+    so memory use does not depend on the size of the history.
+    """
+    target_id = current_user.id
+    user_role = UserRole(current_user.role)
+    if user_id is not None and user_id != current_user.id:
+        if user_role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        if not db.query(models.User.id).filter(models.User.id == user_id).first():
+            raise HTTPException(status_code=404, detail="User not found")
+        target_id = user_id
+    
+    requested = readable_collections(collections, user_role)
+    
+    log_user_action(db, current_user.id, "EXPORT_DATA",
+                    f"Exported {', '.join(requested)} of user {target_id} as {export_format}")
+    
+    rows = iter_csv if export_format == "csv" else iter_ndjson
+    last_write = last_write_from(request, current_user.id)
+    filename = f"export-user{target_id}-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        rows(lambda: read_router.session_for(current_user.id, last_write), target_id, requested),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# STREAK AND CONSISTENCY ANALYTICS
+@app.get("/analytics/consistency", response_model=Dict[str, schemas.ConsistencyAnalyticsOut])
+async def get_consistency_analytics(
+    collections: Optional[str] = Query(None, description="Comma-separated; defaults to every collection the role can read"),
+    rolling_days: int = Query(0, ge=0, le=TIMESERIES_MAX_DAYS, description="Include rolling 7/30-day consistency for this many days"),
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Streaks, gaps, 7/30-day consistency and weekday histogram per collection.
+
+    Active days for every requested collection come from one daily_rollups
+    query; the metrics are computed in memory by analytics.py.
+    """
+    requested = readable_collections(collections, UserRole(current_user.role))
+    rows = (await db.execute(active_days_statement(current_user.id, requested))).all()
+    today = date.today()
     return {
-        "period_days": days,
-        "summary": {
-            "nutrition_entries": nutrition_count,
-            "sleep_entries": sleep_count,
-            "mood_entries": mood_count,
-            "meditation_entries": meditation_count,
-            "hydration_entries": hydration_count,
-            "total_entries": nutrition_count + sleep_count + mood_count + meditation_count + hydration_count
-        }
+        name: analyze(days, today, rolling_days)
+        for name, days in split_active_days(rows, requested).items()
     }
+
+# DASHBOARD SUMMARY
+@app.get("/wellness/summary")
+async def get_wellness_dashboard_summary(
+    days: int = 30,
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get wellness summary for dashboard: entry counts plus per-type averages and totals"""
+    cache_key = f"wellness_summary:{days}"
+    cached = dashboard_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return cached
+    
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    
+    # Counts and averages for all five entry types in one round trip
+    rows = (await db.execute(wellness_summary_statement(current_user.id, start_date))).all()
+    summary = build_wellness_summary(rows, days)
+    dashboard_cache.set(current_user.id, cache_key, summary)
+    return summary
 # NUTRITION UPDATE ENDPOINT
 @app.put("/wellness/nutrition/{entry_id}", response_model=schemas.NutritionOut)
 def update_nutrition_entry(
@@ -1968,9 +2166,12 @@ def update_nutrition_entry(
         entry.sugar = nutrition_data.sugar
         entry.fat = nutrition_data.fat
         entry.notes = nutrition_data.notes
+        bump_collection_version(db, current_user.id, "nutrition")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         
         db.commit()
         db.refresh(entry)
+        dashboard_cache.invalidate(current_user.id)
         
         # Log the action
         log_user_action(
@@ -2013,9 +2214,12 @@ def update_sleep_entry(
         entry.sleep_quality = sleep_data.sleep_quality
         entry.sleep_duration = sleep_data.sleep_duration
         entry.notes = sleep_data.notes
+        bump_collection_version(db, current_user.id, "sleep")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         
         db.commit()
         db.refresh(entry)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -2057,9 +2261,12 @@ def update_mood_entry(
         entry.energy_level = mood_data.energy_level
         entry.stress_level = mood_data.stress_level
         entry.notes = mood_data.notes
+        bump_collection_version(db, current_user.id, "mood")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         
         db.commit()
         db.refresh(entry)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -2099,9 +2306,12 @@ def update_meditation_entry(
         entry.duration = meditation_data.duration
         entry.meditation_type = meditation_data.meditation_type
         entry.notes = meditation_data.notes
+        bump_collection_version(db, current_user.id, "meditation")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         
         db.commit()
         db.refresh(entry)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
@@ -2141,9 +2351,12 @@ def update_hydration_entry(
         entry.water_intake = hydration_data.water_intake
         entry.time_logged = hydration_data.time_logged
         entry.notes = hydration_data.notes
+        bump_collection_version(db, current_user.id, "hydration")
+        refresh_daily_rollups(db, current_user.id, [entry.date])
         
         db.commit()
         db.refresh(entry)
+        dashboard_cache.invalidate(current_user.id)
         
         log_user_action(
             db, 
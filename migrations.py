@@ -0,0 +1,70 @@
+# migrations.py - Lightweight schema upgrades for existing databases
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import models
+import rollups
+
+def add_missing_columns(engine: Engine):
+    """Add model columns that are missing from existing tables.
+
+    create_all() only creates missing tables, so databases created by an
+    older version (e.g. an existing users.db) need new nullable columns added
+    explicitly. Columns are added without defaults; code treats NULL as
+    "not yet populated".
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def create_missing_indexes(engine: Engine):
+    """Create indexes declared on the models that existing tables lack"""
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+def backfill_daily_rollups(engine: Engine) -> int:
+    """Fill daily_rollups from existing entries if it has never been filled.
+
+    The table is new to databases created by an older version, and write
+    endpoints only refresh the days they touch, so without this every report
+    read from rollups would ignore the history. An empty table next to raw
+    entries means it was never filled; it is rebuilt one user (and one
+    transaction) at a time. Returns the number of rollup rows written.
+    """
+    written = 0
+    with Session(engine) as db:
+        if db.query(models.DailyRollup.user_id).first() is not None:
+            return 0
+        user_ids = set()
+        for model, _ in rollups.ROLLUP_SOURCES:
+            user_ids.update(row[0] for row in db.query(model.user_id).distinct())
+        for user_id in sorted(user_ids):
+            written += rollups._rebuild(db, user_id, None)
+            db.commit()
+    return written
+
+def run_migrations(engine: Engine):
+    """Bring an existing database up to date with the current models"""
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    backfill_daily_rollups(engine)
+
+if __name__ == "__main__":
+    from database import engine
+    print("Running migrations...")
+    models.Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    print("Migrations completed!")
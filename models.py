@@ -1,11 +1,9 @@
 # models.py - Enhanced version with Role-Based Access Control (FIXED)
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Date, Enum, JSON, func
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Date, Enum, JSON, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 import enum
-
-Base = declarative_base()
+from database import Base
 
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
@@ -90,6 +88,9 @@ class User(Base):
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -105,6 +106,9 @@ class Activity(Base):
     
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_id_status", "user_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -121,6 +125,9 @@ class Goal(Base):
 
 class UserStats(Base):
     __tablename__ = "user_stats"
+    __table_args__ = (
+        Index("ix_user_stats_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -131,6 +138,8 @@ class UserStats(Base):
     avg_calories_per_day = Column(Float, default=0.0)
     current_streak = Column(Integer, default=0)
     longest_streak = Column(Integer, default=0)
+    trailing_streak = Column(Integer, default=0)  # run of days ending at last_activity_date
+    first_activity_date = Column(Date)
     last_activity_date = Column(Date)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -192,6 +201,11 @@ class UserPermission(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+        Index("ix_audit_logs_timestamp", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -206,6 +220,41 @@ class AuditLog(Base):
     # Relationships
     user = relationship("User", back_populates="audit_logs")
 
+class CollectionVersion(Base):
+    """Opaque version token per user and collection, changed by every write (used for ETags)"""
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    collection = Column(String(50), primary_key=True)  # activities, goals, nutrition, sleep, etc.
+    version = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DailyRollup(Base):
+    """Per-user, per-day totals over activities and wellness entries (maintained by rollups.py).
+
+    Sums rather than averages are stored so rows can be re-aggregated into
+    weeks or months; divide by the matching *_entries column for averages.
+    """
+    __tablename__ = "daily_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    activity_count = Column(Integer, nullable=False, default=0)
+    activity_minutes = Column(Integer, nullable=False, default=0)
+    calories_out = Column(Integer, nullable=False, default=0)
+    nutrition_entries = Column(Integer, nullable=False, default=0)
+    calories_in = Column(Integer, nullable=False, default=0)
+    sleep_entries = Column(Integer, nullable=False, default=0)
+    sleep_minutes = Column(Integer, nullable=False, default=0)
+    sleep_quality_total = Column(Integer, nullable=False, default=0)
+    mood_entries = Column(Integer, nullable=False, default=0)
+    mood_rating_total = Column(Integer, nullable=False, default=0)
+    meditation_entries = Column(Integer, nullable=False, default=0)
+    meditation_minutes = Column(Integer, nullable=False, default=0)
+    hydration_entries = Column(Integer, nullable=False, default=0)
+    water_intake = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class RolePermission(Base):
     """Default permissions for each role"""
     __tablename__ = "role_permissions"
@@ -235,8 +284,21 @@ class Session(Base):
     
     # Relationships
     user = relationship("User")
+
+class AuthToken(Base):
+    """Terms-acceptance tokens handed out by /terms/agree (shared by all workers)"""
+    __tablename__ = "auth_tokens"
+    
+    token = Column(String(64), primary_key=True)
+    valid = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 class NutritionEntry(Base):
     __tablename__ = "nutrition_entries"
+    __table_args__ = (
+        Index("ix_nutrition_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -257,6 +319,9 @@ class NutritionEntry(Base):
 
 class SleepEntry(Base):
     __tablename__ = "sleep_entries"
+    __table_args__ = (
+        Index("ix_sleep_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -274,6 +339,9 @@ class SleepEntry(Base):
 
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
+    __table_args__ = (
+        Index("ix_mood_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -291,6 +359,9 @@ class MoodEntry(Base):
 
 class MeditationEntry(Base):
     __tablename__ = "meditation_entries"
+    __table_args__ = (
+        Index("ix_meditation_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -306,6 +377,9 @@ class MeditationEntry(Base):
 
 class HydrationEntry(Base):
     __tablename__ = "hydration_entries"
+    __table_args__ = (
+        Index("ix_hydration_entries_user_id_date", "user_id", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,89 @@
+# pagination.py - Offset and keyset (cursor) pagination for list endpoints
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Date, Select, desc, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Opaque cursor for the position just after (sort_value, row_id)"""
+    if isinstance(sort_value, (date, datetime)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[object, int]:
+    """Decode a cursor produced by encode_cursor for the given sort column"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(sort_column.type, Date):
+            sort_value = date.fromisoformat(sort_value)
+        else:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def _page(query, sort_column, id_column, limit: int, skip: int, cursor: Optional[str]):
+    """Apply ordering, cursor/offset and limit to a Query or a select()"""
+    query = query.order_by(desc(sort_column), desc(id_column))
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+def _set_next_cursor(rows: list, sort_column, id_column, response: Response, limit: int):
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+
+def paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    response: Response,
+    limit: int = 100,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> list:
+    """Return one page of query ordered by (sort_column, id) descending.
+
+    With a cursor the page starts right after the cursor position using a
+    row-value comparison, so deep pages cost the same as the first page;
+    skip is ignored. Without one, classic offset pagination is used. Either
+    way, a full page sets the X-Next-Cursor header for the following page.
+    """
+    rows = _page(query, sort_column, id_column, limit, skip, cursor).all()
+    _set_next_cursor(rows, sort_column, id_column, response, limit)
+    return rows
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    sort_column,
+    id_column,
+    response: Response,
+    limit: int = 100,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> list:
+    """paginate() for a select() of ORM entities run on an async session"""
+    statement = _page(statement, sort_column, id_column, limit, skip, cursor)
+    rows = (await db.scalars(statement)).all()
+    _set_next_cursor(rows, sort_column, id_column, response, limit)
+    return rows
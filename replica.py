@@ -0,0 +1,182 @@
+# replica.py - Primary/replica session routing with a read-your-writes window
+#
+# Usage (keep a local SQLite replica in sync):
+#   python replica.py --interval 5
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from fastapi import Depends, Request
+from jose import JWTError, jwt
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+from auth import get_current_active_user, get_current_active_user_async, SECRET_KEY, ALGORITHM
+from database import (
+    SessionLocal,
+    ReplicaSessionLocal,
+    AsyncSessionLocal,
+    AsyncReplicaSessionLocal,
+    engine,
+    replica_engine
+)
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "15"))  # must exceed the replica lag
+READ_YOUR_WRITES_MAX_USERS = int(os.getenv("READ_YOUR_WRITES_MAX_USERS", "100000"))
+
+# Requests with these methods never mark a user as a recent writer
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# The time of a user's last write travels with the client (as a cookie and
+# as a header API clients can echo back), so every worker sees it
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+def sign_last_write(user_id: int, written_at: Optional[float] = None) -> str:
+    """Signed marker of a user's write, valid for the read-your-writes window"""
+    written_at = time.time() if written_at is None else written_at
+    return jwt.encode(
+        {"sub": str(user_id), "type": "last_write", "wrote": written_at, "exp": int(written_at + READ_YOUR_WRITES_SECONDS) + 1},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+
+def last_write_from(request: Optional[Request], user_id: int) -> Optional[float]:
+    """Time of the user's last write carried by the request, if validly signed"""
+    if request is None:
+        return None
+    token = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "last_write" or payload.get("sub") != str(user_id):
+        return None
+    return payload.get("wrote")
+
+class RecentWriters:
+    """Users who wrote through this process within the last window seconds
+    (bounded, oldest dropped first); the last_write marker covers writes
+    made through other workers"""
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS, max_users: int = READ_YOUR_WRITES_MAX_USERS):
+        self.window = window
+        self.max_users = max_users
+        self._writes: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int):
+        with self._lock:
+            self._writes[user_id] = time.monotonic()
+            self._writes.move_to_end(user_id)
+            while len(self._writes) > self.max_users:
+                self._writes.popitem(last=False)
+
+    def wrote_recently(self, user_id: int) -> bool:
+        with self._lock:
+            written_at = self._writes.get(user_id)
+            if written_at is None:
+                return False
+            if time.monotonic() - written_at < self.window:
+                return True
+            del self._writes[user_id]
+            return False
+
+    def __len__(self):
+        return len(self._writes)
+
+class ReadRouter:
+    """Hands out replica sessions for reads unless the user just wrote"""
+
+    def __init__(self, writers: RecentWriters):
+        self.writers = writers
+        self.enabled = replica_engine is not engine
+        self._lock = threading.Lock()
+        self.replica_sessions = 0
+        self.primary_sessions = 0
+
+    def _use_primary(self, user_id: int, last_write: Optional[float] = None) -> bool:
+        use_primary = (
+            not self.enabled
+            or self.writers.wrote_recently(user_id)
+            or (last_write is not None and time.time() - last_write < self.writers.window)
+        )
+        with self._lock:
+            if use_primary:
+                self.primary_sessions += 1
+            else:
+                self.replica_sessions += 1
+        return use_primary
+
+    def session_for(self, user_id: int, last_write: Optional[float] = None) -> Session:
+        return SessionLocal() if self._use_primary(user_id, last_write) else ReplicaSessionLocal()
+
+    def async_session_for(self, user_id: int, last_write: Optional[float] = None) -> AsyncSession:
+        return AsyncSessionLocal() if self._use_primary(user_id, last_write) else AsyncReplicaSessionLocal()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "read_your_writes_seconds": self.writers.window,
+                "recent_writers": len(self.writers),
+                "replica_sessions": self.replica_sessions,
+                "primary_sessions": self.primary_sessions
+            }
+
+recent_writers = RecentWriters()
+read_router = ReadRouter(recent_writers)
+
+def get_read_db(request: Request, current_user: models.User = Depends(get_current_active_user)):
+    """Session for read-only endpoints: the replica, or the primary within the
+    user's read-your-writes window. Never write through it."""
+    db = read_router.session_for(current_user.id, last_write_from(request, current_user.id))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request, current_user: models.User = Depends(get_current_active_user_async)):
+    """get_read_db() for async endpoints"""
+    async with read_router.async_session_for(current_user.id, last_write_from(request, current_user.id)) as db:
+        yield db
+
+def sync_sqlite_replica(primary: Engine = engine, replica: Engine = replica_engine, pages: int = 1024):
+    """Copy the primary SQLite file onto the replica with the online backup API.
+
+    Pages are copied in steps of `pages`, so writers on the primary are only
+    paused briefly; replica readers see the new snapshot once it completes.
+    """
+    if primary.url.get_backend_name() != "sqlite" or replica.url.get_backend_name() != "sqlite":
+        raise ValueError("sync_sqlite_replica needs SQLite primary and replica URLs")
+    if primary.url.database == replica.url.database:
+        raise ValueError("Replica and primary point at the same file")
+
+    source = sqlite3.connect(primary.url.database)
+    target = sqlite3.connect(replica.url.database)
+    try:
+        source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep a local SQLite read replica in sync")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between syncs")
+    parser.add_argument("--once", action="store_true", help="sync once and exit")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        sync_sqlite_replica()
+        print(f"Replica synced in {(time.perf_counter() - started) * 1000:.1f} ms")
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,173 @@
+# rollups.py - Per-user daily rollups of activities and wellness entries
+#
+# Write endpoints refresh the days they touch; rebuild everything offline
+# (after upgrading, or after loading data outside the API) with:
+#   python rollups.py [--user-id N]
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Date, and_, func, or_
+from sqlalchemy.orm import Session
+import models
+
+# Raw table -> rollup columns and the aggregate that fills each one
+ROLLUP_SOURCES = [
+    (models.Activity, {
+        "activity_count": func.count(models.Activity.id),
+        "activity_minutes": func.sum(models.Activity.duration),
+        "calories_out": func.sum(models.Activity.calories_burned),
+    }),
+    (models.NutritionEntry, {
+        "nutrition_entries": func.count(models.NutritionEntry.id),
+        "calories_in": func.sum(models.NutritionEntry.calories),
+    }),
+    (models.SleepEntry, {
+        "sleep_entries": func.count(models.SleepEntry.id),
+        "sleep_minutes": func.sum(models.SleepEntry.sleep_duration),
+        "sleep_quality_total": func.sum(models.SleepEntry.sleep_quality),
+    }),
+    (models.MoodEntry, {
+        "mood_entries": func.count(models.MoodEntry.id),
+        "mood_rating_total": func.sum(models.MoodEntry.mood_rating),
+    }),
+    (models.MeditationEntry, {
+        "meditation_entries": func.count(models.MeditationEntry.id),
+        "meditation_minutes": func.sum(models.MeditationEntry.duration),
+    }),
+    (models.HydrationEntry, {
+        "hydration_entries": func.count(models.HydrationEntry.id),
+        "water_intake": func.sum(models.HydrationEntry.water_intake),
+    }),
+]
+
+ROLLUP_COLUMNS = [column for _, aggregates in ROLLUP_SOURCES for column in aggregates]
+
+def empty_rollup(day: date) -> dict:
+    """Rollup values of a day without any entries"""
+    values = {column: 0 for column in ROLLUP_COLUMNS}
+    values["water_intake"] = 0.0
+    values["day"] = day
+    return values
+
+def _as_day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def _day_of(column):
+    """Calendar day of a Date or DateTime column, computed in SQL"""
+    if isinstance(column.type, Date):
+        return column
+    return func.date(column, type_=Date)
+
+def _in_range(column, start: date, end: date):
+    """Index-friendly filter for start <= day(column) <= end"""
+    if isinstance(column.type, Date):
+        return and_(column >= start, column <= end)
+    return and_(column >= datetime.combine(start, time.min), column < datetime.combine(end + timedelta(days=1), time.min))
+
+def _in_ranges(column, ranges: List[Tuple[date, date]]):
+    """_in_range() for any of several inclusive day ranges"""
+    return or_(*[_in_range(column, start, end) for start, end in ranges])
+
+def _aggregate(db: Session, user_id: Optional[int], ranges: Optional[List[Tuple[date, date]]]) -> Dict[Tuple[int, date], dict]:
+    """Rollup values per (user, day) computed from the raw tables: one grouped query per table"""
+    rollups = {}
+    for model, aggregates in ROLLUP_SOURCES:
+        day = _day_of(model.date)
+        query = db.query(model.user_id, day, *aggregates.values())
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        if ranges is not None:
+            query = query.filter(_in_ranges(model.date, ranges))
+        for row in query.group_by(model.user_id, day):
+            key = (row[0], _as_day(row[1]))
+            values = rollups.setdefault(key, empty_rollup(key[1]))
+            for column, value in zip(aggregates, row[2:]):
+                values[column] = value or 0
+    return rollups
+
+def _rebuild(db: Session, user_id: Optional[int], ranges: Optional[List[Tuple[date, date]]]) -> int:
+    rollups = _aggregate(db, user_id, ranges)
+
+    stale = db.query(models.DailyRollup)
+    if user_id is not None:
+        stale = stale.filter(models.DailyRollup.user_id == user_id)
+    if ranges is not None:
+        stale = stale.filter(_in_ranges(models.DailyRollup.day, ranges))
+    stale.delete(synchronize_session=False)
+
+    if rollups:
+        now = datetime.utcnow()
+        db.execute(models.DailyRollup.__table__.insert(), [
+            {**values, "user_id": key[0], "updated_at": now} for key, values in rollups.items()
+        ])
+    return len(rollups)
+
+def rebuild_daily_rollups(
+    db: Session,
+    user_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> int:
+    """Recompute rollup rows from the raw entries.
+
+    Covers one user (or everyone) and an inclusive day range (or all days).
+    Existing rows in scope are replaced; days without entries get no row.
+    Does not commit. Returns the number of rows written.
+    """
+    return _rebuild(db, user_id, [(start, end)] if start is not None else None)
+
+def _day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group days into (first, last) runs of consecutive days"""
+    runs = []
+    for day in sorted(days):
+        if runs and (day - runs[-1][1]).days == 1:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+def refresh_daily_rollups(db: Session, user_id: int, days: Iterable) -> int:
+    """Bring a user's rollups for the days a write touched up to date.
+
+    Call after the write has been applied to the session and before
+    committing (like bump_collection_version), so the rollups change in the
+    same transaction as the entries. Only the given days are re-aggregated
+    (one index range per run of consecutive days, all in the same query per
+    table), so touching a day years ago does not rebuild everything in
+    between.
+    """
+    days = {_as_day(day) for day in days if day is not None}
+    if not days:
+        return 0
+    db.flush()
+    return _rebuild(db, user_id, _day_runs(days))
+
+def fill_daily_series(rows: Iterable, start: date, end: date) -> List[dict]:
+    """One entry per day from start to end: stored rollups, zeros for days without any"""
+    by_day = {row.day: row for row in rows}
+    series = []
+    day = start
+    while day <= end:
+        row = by_day.get(day)
+        if row is None:
+            series.append(empty_rollup(day))
+        else:
+            series.append({"day": day, **{column: getattr(row, column) for column in ROLLUP_COLUMNS}})
+        day += timedelta(days=1)
+    return series
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Rebuild daily rollups from the raw entries")
+    parser.add_argument("--user-id", type=int, help="only rebuild this user")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        written = rebuild_daily_rollups(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {written} daily rollup rows")
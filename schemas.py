@@ -1,6 +1,6 @@
 # schemas.py - Enhanced version with role-based access control
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import Optional, List, Dict, Literal, Union, Annotated
 from datetime import datetime, date
 from enum import Enum
 import enum
@@ -217,6 +217,58 @@ class ActivityOut(ActivityBase):
     class Config:
         orm_mode = True
 
+# Bulk import Schemas
+class BulkRowError(BaseModel):
+    index: int  # position of the record in the request (0-based)
+    detail: str
+
+class BulkImportResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+    errors_truncated: bool = False
+
+# Daily rollup Schemas
+class DailyRollupOut(BaseModel):
+    day: date
+    activity_count: int
+    activity_minutes: int
+    calories_out: int
+    nutrition_entries: int
+    calories_in: int
+    sleep_entries: int
+    sleep_minutes: int
+    sleep_quality_total: int
+    mood_entries: int
+    mood_rating_total: int
+    meditation_entries: int
+    meditation_minutes: int
+    hydration_entries: int
+    water_intake: float
+
+class ActivityTrendOut(BaseModel):
+    bucket: date  # first day of the day / ISO week / month
+    activity_name: Optional[str] = None  # set when split by activity
+    activities_count: int
+    total_calories: int
+    total_duration: int
+
+class ConsistencyAnalyticsOut(BaseModel):
+    active_days: int
+    first_day: Optional[date] = None
+    last_day: Optional[date] = None
+    current_streak: int
+    trailing_streak: int
+    longest_streak: int
+    gap_count: int
+    longest_gap: int
+    average_gap: float
+    weekday_histogram: List[int]  # Monday first
+    consistency_7d: float
+    consistency_30d: float
+    rolling: Optional[Dict[str, List[float]]] = None  # "7d"/"30d" -> one value per day, oldest first
+
 # Goal Schemas
 class GoalBase(BaseModel):
     goal_type: str
@@ -266,7 +318,7 @@ class AuditLogOut(BaseModel):
     id: int
     user_id: int
     action: str
-    resource_type: str
+    resource_type: Optional[str] = None
     resource_id: Optional[int] = None
     details: Optional[str] = None
     ip_address: Optional[str] = None
@@ -371,6 +423,40 @@ class HydrationCreate(BaseModel):
     water_intake: float  # in liters or cups
     time_logged: datetime
     notes: Optional[str] = None
+
+# Bulk wellness Schemas: each entry is a *Create model tagged with its type
+class NutritionBulkEntry(NutritionCreate):
+    type: Literal["nutrition"]
+    entry_date: Optional[date] = Field(None, alias="date")  # defaults to today
+
+class SleepBulkEntry(SleepCreate):
+    type: Literal["sleep"]
+    entry_date: Optional[date] = Field(None, alias="date")
+
+class MoodBulkEntry(MoodCreate):
+    type: Literal["mood"]
+    entry_date: Optional[date] = Field(None, alias="date")
+
+class MeditationBulkEntry(MeditationCreate):
+    type: Literal["meditation"]
+    entry_date: Optional[date] = Field(None, alias="date")
+
+class HydrationBulkEntry(HydrationCreate):
+    type: Literal["hydration"]
+    entry_date: Optional[date] = Field(None, alias="date")
+
+WellnessBulkEntry = Annotated[
+    Union[NutritionBulkEntry, SleepBulkEntry, MoodBulkEntry, MeditationBulkEntry, HydrationBulkEntry],
+    Field(discriminator="type")
+]
+
+class WellnessBulkCreate(BaseModel):
+    entries: List[WellnessBulkEntry]
+
+class WellnessBulkResult(BaseModel):
+    inserted: int
+    by_type: Dict[str, int]
+
 class NutritionOut(BaseModel):
     id: int
     user_id: int
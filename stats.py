@@ -0,0 +1,441 @@
+# stats.py - Incremental maintenance of the per-user UserStats record
+from collections import namedtuple
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Float, case, cast, distinct, func, literal, null, select, union_all
+from sqlalchemy.sql import Select
+from sqlalchemy.orm import Session
+import analytics
+import models
+
+# The parts of an activity that contribute to UserStats. Snapshots are taken
+# before an update/delete so the old values can be subtracted afterwards.
+ActivitySnapshot = namedtuple("ActivitySnapshot", ["day", "calories", "duration"])
+
+def empty_stats() -> dict:
+    """Stats for a user without any activities"""
+    return {
+        "total_activities": 0,
+        #"total_distance": 0.0,
+        "total_calories": 0,
+        "total_duration": 0,
+        "avg_calories_per_day": 0.0,
+        "current_streak": 0,
+        "longest_streak": 0,
+        "trailing_streak": 0,
+        "first_activity_date": None,
+        "last_activity_date": None
+    }
+
+def _as_date(value) -> Optional[date]:
+    """Normalise a stored date/datetime (or legacy string) to a date"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.split()[0].split("T")[0], "%Y-%m-%d").date()
+        except (ValueError, IndexError):
+            return None
+    return value
+
+def snapshot_activity(activity: models.Activity) -> ActivitySnapshot:
+    """Capture the stats-relevant values of an activity"""
+    return ActivitySnapshot(
+        day=_as_date(activity.date),
+        calories=activity.calories_burned or 0,
+        duration=activity.duration or 0
+    )
+
+def _streaks_from_dates(activity_dates: Iterable[date]) -> Tuple[int, int]:
+    """Return (trailing_streak, longest_streak) for sorted, distinct dates.
+
+    The trailing streak is the run of consecutive days ending at the last
+    activity date; it only counts as the current streak while that date is today.
+    """
+    streaks = analytics.streaks(analytics.day_ordinals(activity_dates))
+    return streaks["trailing_streak"], streaks["longest_streak"]
+
+def _derived_stats(total_calories: int, first_activity_date: Optional[date],
+                   last_activity_date: Optional[date], trailing_streak: int) -> dict:
+    """Compute the fields that depend on today's date"""
+    today = date.today()
+    avg_calories_per_day = 0.0
+    if first_activity_date:
+        days_active = (today - first_activity_date).days + 1
+        avg_calories_per_day = total_calories / days_active if days_active > 0 else 0.0
+
+    current_streak = trailing_streak if last_activity_date == today else 0
+    return {
+        "avg_calories_per_day": avg_calories_per_day,
+        "current_streak": current_streak
+    }
+
+def _distinct_activity_dates(user_id: int, db: Session) -> List[date]:
+    """Sorted distinct calendar days on which the user has activities"""
+    rows = db.query(func.date(models.Activity.date)).filter(
+        models.Activity.user_id == user_id
+    ).distinct().all()
+    return sorted(d for d in (_as_date(row[0]) for row in rows) if d is not None)
+
+def calculate_user_stats(user_id: int, db: Session):
+    """Calculate user statistics from scratch (repair path).
+
+    Totals come from a single aggregate query and streaks from the distinct
+    activity days, so no Activity rows are loaded.
+    """
+    try:
+        totals = db.query(
+            func.count(models.Activity.id),
+            func.coalesce(func.sum(models.Activity.calories_burned), 0),
+            func.coalesce(func.sum(models.Activity.duration), 0),
+            func.min(models.Activity.date),
+            func.max(models.Activity.date)
+        ).filter(models.Activity.user_id == user_id).one()
+        total_activities, total_calories, total_duration, first_date, last_date = totals
+
+        if not total_activities:
+            return empty_stats()
+
+        activity_dates = _distinct_activity_dates(user_id, db)
+    except Exception:
+        # If there's an error querying activities, return empty stats
+        return empty_stats()
+
+    trailing_streak, longest_streak = _streaks_from_dates(activity_dates)
+    first_activity_date = _as_date(first_date)
+    last_activity_date = _as_date(last_date)
+
+    stats_data = {
+        "total_activities": total_activities,
+        #"total_distance": total_distance,
+        "total_calories": int(total_calories),
+        "total_duration": int(total_duration),
+        "longest_streak": longest_streak,
+        "trailing_streak": trailing_streak,
+        "first_activity_date": first_activity_date,
+        "last_activity_date": last_activity_date
+    }
+    stats_data.update(_derived_stats(stats_data["total_calories"], first_activity_date, last_activity_date, trailing_streak))
+    return stats_data
+
+def _query_user_stats(user_id: int, db: Session, repair: bool = True) -> Optional[models.UserStats]:
+    """Load the stats row, dropping it if legacy date values can't be parsed.
+
+    With repair=False (replica sessions) an unreadable row is reported as
+    missing instead of deleted, leaving the repair to the primary.
+    """
+    try:
+        return db.query(models.UserStats).filter(models.UserStats.user_id == user_id).first()
+    except ValueError as e:
+        # Handle date parsing errors by recreating the stats record
+        if "Invalid isoformat string" in str(e):
+            if not repair:
+                db.rollback()
+                return None
+            db.query(models.UserStats).filter(models.UserStats.user_id == user_id).delete(synchronize_session=False)
+            db.commit()
+            return None
+        raise e
+
+def rebuild_user_stats(user_id: int, db: Session) -> models.UserStats:
+    """Recompute a user's stats record from their full activity history"""
+    user_stats = _query_user_stats(user_id, db)
+
+    if not user_stats:
+        user_stats = models.UserStats(user_id=user_id)
+        db.add(user_stats)
+        db.commit()
+        db.refresh(user_stats)
+
+    try:
+        stats_data = calculate_user_stats(user_id, db)
+        for key, value in stats_data.items():
+            setattr(user_stats, key, value)
+
+        db.commit()
+        db.refresh(user_stats)
+    except Exception:
+        db.rollback()
+        # If there's still an error, return basic stats
+        user_stats = models.UserStats(user_id=user_id, **empty_stats())
+        db.add(user_stats)
+        db.commit()
+        db.refresh(user_stats)
+
+    return user_stats
+
+def _needs_rebuild(user_stats: Optional[models.UserStats]) -> bool:
+    """Rows created before incremental maintenance lack the streak state"""
+    return user_stats is None or user_stats.trailing_streak is None
+
+def _refresh_derived(user_stats: models.UserStats) -> bool:
+    """Update today-relative fields in place; returns True if anything changed"""
+    derived = _derived_stats(
+        user_stats.total_calories or 0,
+        user_stats.first_activity_date,
+        user_stats.last_activity_date,
+        user_stats.trailing_streak or 0
+    )
+    changed = False
+    for key, value in derived.items():
+        if getattr(user_stats, key) != value:
+            setattr(user_stats, key, value)
+            changed = True
+    return changed
+
+def get_or_create_user_stats(user_id: int, db: Session) -> models.UserStats:
+    """Get the user's stats record, creating it from history if missing.
+
+    Totals and streak state are kept current by apply_activity_delta, so a
+    read only has to refresh the fields that depend on today's date.
+    """
+    user_stats = _query_user_stats(user_id, db)
+    if _needs_rebuild(user_stats):
+        return rebuild_user_stats(user_id, db)
+
+    if _refresh_derived(user_stats):
+        db.commit()
+        db.refresh(user_stats)
+    return user_stats
+
+def read_user_stats(user_id: int, db: Session) -> Optional[models.UserStats]:
+    """Read-only variant of get_or_create_user_stats for replica sessions.
+
+    Date-relative fields are refreshed in memory but never committed; returns
+    None when the row is missing or needs a rebuild, which requires the
+    primary.
+    """
+    user_stats = _query_user_stats(user_id, db, repair=False)
+    if _needs_rebuild(user_stats):
+        return None
+    _refresh_derived(user_stats)
+    return user_stats
+
+def _activities_on_day(user_id: int, day: date, db: Session) -> int:
+    """Count the user's activities on a calendar day"""
+    start = datetime.combine(day, time.min)
+    return db.query(func.count(models.Activity.id)).filter(
+        models.Activity.user_id == user_id,
+        models.Activity.date >= start,
+        models.Activity.date < start + timedelta(days=1)
+    ).scalar() or 0
+
+def _recompute_streaks(user_stats: models.UserStats, user_id: int, db: Session):
+    """Recompute date bounds and streaks from the user's activity dates"""
+    activity_dates = _distinct_activity_dates(user_id, db)
+    trailing_streak, longest_streak = _streaks_from_dates(activity_dates)
+    user_stats.trailing_streak = trailing_streak
+    user_stats.longest_streak = longest_streak
+    user_stats.first_activity_date = activity_dates[0] if activity_dates else None
+    user_stats.last_activity_date = activity_dates[-1] if activity_dates else None
+
+def _add_day(user_stats: models.UserStats, day: date) -> bool:
+    """Account for a newly active day; returns False if a recompute is needed"""
+    first = user_stats.first_activity_date
+    last = user_stats.last_activity_date
+
+    if first is None or last is None:
+        user_stats.first_activity_date = day
+        user_stats.last_activity_date = day
+        user_stats.trailing_streak = 1
+        user_stats.longest_streak = max(user_stats.longest_streak or 0, 1)
+        return True
+
+    if day > last:
+        user_stats.trailing_streak = (user_stats.trailing_streak or 0) + 1 if (day - last).days == 1 else 1
+        user_stats.last_activity_date = day
+        user_stats.longest_streak = max(user_stats.longest_streak or 0, user_stats.trailing_streak)
+        return True
+
+    if (first - day).days > 1:
+        # An isolated day before all other history starts a run of one
+        user_stats.first_activity_date = day
+        user_stats.longest_streak = max(user_stats.longest_streak or 0, 1)
+        return True
+
+    # Backfilling inside or adjacent to existing history can merge runs
+    return False
+
+def _remove_day(user_stats: models.UserStats, day: date) -> bool:
+    """Account for a day that no longer has activities; False if a recompute is needed"""
+    trailing_streak = user_stats.trailing_streak or 0
+    if day == user_stats.last_activity_date and day != user_stats.first_activity_date and trailing_streak > 1:
+        # The trailing run shrinks by one; only the longest streak is in doubt
+        if trailing_streak >= (user_stats.longest_streak or 0):
+            return False
+        user_stats.last_activity_date = day - timedelta(days=1)
+        user_stats.trailing_streak = trailing_streak - 1
+        return True
+    return False
+
+def apply_activity_delta(
+    user_id: int,
+    db: Session,
+    removed: Optional[ActivitySnapshot] = None,
+    added: Optional[ActivitySnapshot] = None
+) -> models.UserStats:
+    """Apply a single activity add/update/delete to the user's stats.
+
+    Call after the activity change has been flushed and before committing,
+    so the stats move in the same transaction as the activity. Totals are
+    adjusted in O(1); streaks fall back to a date-only recompute only when a
+    day is backfilled into or removed from the middle of the history.
+    """
+    user_stats = _query_user_stats(user_id, db)
+    if _needs_rebuild(user_stats):
+        if user_stats is None:
+            user_stats = models.UserStats(user_id=user_id)
+            db.add(user_stats)
+        for key, value in calculate_user_stats(user_id, db).items():
+            setattr(user_stats, key, value)
+        return user_stats
+
+    if removed and added and removed.day == added.day:
+        # Same day: the set of active days, and so the streaks, can't change
+        removed_day = added_day = None
+    else:
+        removed_day = removed.day if removed else None
+        added_day = added.day if added else None
+
+    if removed:
+        user_stats.total_activities = max((user_stats.total_activities or 0) - 1, 0)
+        user_stats.total_calories = (user_stats.total_calories or 0) - removed.calories
+        user_stats.total_duration = (user_stats.total_duration or 0) - removed.duration
+    if added:
+        user_stats.total_activities = (user_stats.total_activities or 0) + 1
+        user_stats.total_calories = (user_stats.total_calories or 0) + added.calories
+        user_stats.total_duration = (user_stats.total_duration or 0) + added.duration
+
+    incremental = True
+    if removed_day is not None and _activities_on_day(user_id, removed_day, db) == 0:
+        incremental = _remove_day(user_stats, removed_day)
+    if incremental and added_day is not None and _activities_on_day(user_id, added_day, db) == 1:
+        incremental = _add_day(user_stats, added_day)
+
+    if user_stats.total_activities == 0:
+        for key, value in empty_stats().items():
+            setattr(user_stats, key, value)
+    elif not incremental:
+        _recompute_streaks(user_stats, user_id, db)
+
+    _refresh_derived(user_stats)
+    return user_stats
+
+def activity_window_summaries(user_id: int, db: Session, windows: Sequence[int] = (7, 30)) -> Dict[int, dict]:
+    """Summarise the user's recent activities for several trailing windows.
+
+    One grouped query over the widest window computes conditional sums for
+    every narrower window, so all summaries cost a single round trip.
+    """
+    now = datetime.now()
+    cutoffs = {days: now - timedelta(days=days) for days in windows}
+    widest = min(cutoffs.values())
+
+    columns = []
+    for days in windows:
+        in_window = models.Activity.date >= cutoffs[days]
+        columns.extend([
+            func.sum(case((in_window, 1), else_=0)),
+            func.sum(case((in_window, func.coalesce(models.Activity.calories_burned, 0)), else_=0)),
+            func.sum(case((in_window, models.Activity.duration), else_=0))
+        ])
+
+    rows = db.query(models.Activity.activity_name, *columns).filter(
+        models.Activity.user_id == user_id,
+        models.Activity.date >= widest
+    ).group_by(models.Activity.activity_name).all()
+
+    summaries = {}
+    for i, days in enumerate(windows):
+        summary = {
+            "activities_count": 0,
+            #"total_distance": 0.0,
+            "total_calories": 0,
+            "total_duration": 0,
+            "activity_types": []
+        }
+        for row in rows:
+            count, calories, duration = row[1 + 3 * i:4 + 3 * i]
+            if not count:
+                continue
+            summary["activities_count"] += int(count)
+            summary["total_calories"] += int(calories or 0)
+            summary["total_duration"] += int(duration or 0)
+            summary["activity_types"].append(row[0])
+        summaries[days] = summary
+    return summaries
+
+# Per-type metrics of the wellness summary, aggregated over the period
+WELLNESS_SUMMARY_METRICS = {
+    "nutrition": (models.NutritionEntry, [
+        ("total_calories", func.sum(models.NutritionEntry.calories)),
+        ("total_protein", func.sum(models.NutritionEntry.protein)),
+        ("total_carbs", func.sum(models.NutritionEntry.carbs)),
+        ("total_fat", func.sum(models.NutritionEntry.fat)),
+        ("total_sugar", func.sum(models.NutritionEntry.sugar)),
+    ]),
+    "sleep": (models.SleepEntry, [
+        ("avg_quality", func.avg(models.SleepEntry.sleep_quality)),
+        ("avg_duration_minutes", func.avg(models.SleepEntry.sleep_duration)),
+    ]),
+    "mood": (models.MoodEntry, [
+        ("avg_rating", func.avg(models.MoodEntry.mood_rating)),
+        ("avg_energy", func.avg(models.MoodEntry.energy_level)),
+        ("avg_stress", func.avg(models.MoodEntry.stress_level)),
+    ]),
+    "meditation": (models.MeditationEntry, [
+        ("total_minutes", func.sum(models.MeditationEntry.duration)),
+    ]),
+    "hydration": (models.HydrationEntry, [
+        ("total_intake", func.sum(models.HydrationEntry.water_intake)),
+        ("days_logged", func.count(distinct(models.HydrationEntry.date))),
+    ]),
+}
+
+def wellness_summary_statement(user_id: int, start_date: date) -> Select:
+    """One UNION ALL over the five wellness tables: a row per entry type.
+
+    Each row is (type, count, metric...) with the type's metrics from
+    WELLNESS_SUMMARY_METRICS in order, padded with NULLs to a common width.
+    """
+    width = max(len(metrics) for _, metrics in WELLNESS_SUMMARY_METRICS.values())
+    selects = []
+    for entry_type, (model, metrics) in WELLNESS_SUMMARY_METRICS.items():
+        values = [cast(expression, Float) for _, expression in metrics]
+        values += [cast(null(), Float)] * (width - len(values))
+        selects.append(
+            select(literal(entry_type).label("type"), func.count(model.id), *values).where(
+                model.user_id == user_id,
+                model.date >= start_date
+            )
+        )
+    return union_all(*selects)
+
+def build_wellness_summary(rows, days: int) -> dict:
+    """Shape the rows of wellness_summary_statement() into the summary response"""
+    counts = {}
+    metrics = {}
+    for row in rows:
+        entry_type, count = row[0], int(row[1] or 0)
+        counts[f"{entry_type}_entries"] = count
+        metrics[entry_type] = {
+            name: value for (name, _), value in zip(WELLNESS_SUMMARY_METRICS[entry_type][1], row[2:])
+        }
+
+    hydration = metrics["hydration"]
+    hydration["days_logged"] = int(hydration["days_logged"] or 0)
+    # Average over the days with any intake logged, not over the whole period
+    hydration["avg_daily_intake"] = (
+        hydration["total_intake"] / hydration["days_logged"] if hydration["days_logged"] else None
+    )
+
+    return {
+        "period_days": days,
+        "summary": {
+            **{f"{entry_type}_entries": counts.get(f"{entry_type}_entries", 0) for entry_type in WELLNESS_SUMMARY_METRICS},
+            "total_entries": sum(counts.values())
+        },
+        "metrics": metrics
+    }
@@ -0,0 +1,49 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import models
+from goals import apply_activity_to_goals, sync_goal
+from rollups import refresh_daily_rollups
+from stats import snapshot_activity
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(models.User(id=1, username="runner", email="runner@example.com", hashed_password="x", role="exercise_tracker"))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+def add_activity(db, calories: int) -> models.Activity:
+    activity = models.Activity(user_id=1, activity_name="run", duration=30, calories_burned=calories, date=datetime.utcnow())
+    db.add(activity)
+    refresh_daily_rollups(db, 1, [activity.date])
+    return activity
+
+def test_new_goal_starts_with_existing_progress(db):
+    add_activity(db, 100)
+    db.commit()
+
+    # As create_goal builds it: no status until the insert applies the default
+    goal = models.Goal(user_id=1, goal_type="total_calories", target_value=1000, target_date=datetime.utcnow() + timedelta(days=7))
+    db.add(goal)
+    sync_goal(db, goal)
+    db.commit()
+    assert goal.status == "active"
+    assert goal.current_value == 100.0
+
+    activity = add_activity(db, 100)
+    apply_activity_to_goals(db, 1, added=snapshot_activity(activity))
+    db.commit()
+    assert goal.current_value == 200.0
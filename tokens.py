@@ -0,0 +1,268 @@
+# tokens.py - Expiring stores for terms-acceptance auth tokens
+import heapq
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+import models
+from auth import create_terms_token, verify_terms_token
+from database import SessionLocal
+
+AUTH_TOKEN_STORE = os.getenv("AUTH_TOKEN_STORE", "database")  # database | memory | signed
+AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", "3600"))
+AUTH_TOKEN_MAX_TOKENS = int(os.getenv("AUTH_TOKEN_MAX_TOKENS", "100000"))
+AUTH_TOKEN_PURGE_INTERVAL_SECONDS = int(os.getenv("AUTH_TOKEN_PURGE_INTERVAL_SECONDS", "300"))
+AUTH_TOKEN_VERIFY_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_VERIFY_CACHE_SIZE", "10000"))
+
+class TokenStore:
+    """Storage interface for auth tokens.
+
+    Lookups are by token (O(1) / primary key). Expired tokens are treated as
+    invalid as soon as they expire and physically removed by purge_expired().
+    """
+
+    def issue(self, ttl: float = AUTH_TOKEN_TTL_SECONDS) -> str:
+        """Create, store and return a new token"""
+        token = secrets.token_urlsafe(32)
+        self.add(token, ttl)
+        return token
+
+    def add(self, token: str, ttl: float = AUTH_TOKEN_TTL_SECONDS):
+        raise NotImplementedError
+
+    def is_valid(self, token: str) -> bool:
+        raise NotImplementedError
+
+    def revoke(self, token: str):
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class MemoryTokenStore(TokenStore):
+    """Per-process store: dict for lookups plus a min-heap ordered by expiry.
+
+    When more than max_tokens are live, the tokens closest to expiry are
+    evicted first.
+    """
+
+    def __init__(self, max_tokens: int = AUTH_TOKEN_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self._tokens: Dict[str, Tuple[float, bool]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expired = 0
+
+    def _pop_heap(self) -> Optional[str]:
+        """Pop the earliest heap entry; drop the token if the entry is still current"""
+        expires_at, token = heapq.heappop(self._expiry_heap)
+        entry = self._tokens.get(token)
+        if entry is not None and entry[0] == expires_at:
+            del self._tokens[token]
+            return token
+        return None
+
+    def add(self, token, ttl=AUTH_TOKEN_TTL_SECONDS):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._tokens[token] = (expires_at, True)
+            heapq.heappush(self._expiry_heap, (expires_at, token))
+            while len(self._tokens) > self.max_tokens:
+                if self._pop_heap() is not None:
+                    self.evictions += 1
+
+    def is_valid(self, token):
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return False
+            expires_at, valid = entry
+            if expires_at <= time.time():
+                # Lazy expiry; the stale heap entry is skipped on purge
+                del self._tokens[token]
+                self.expired += 1
+                return False
+            return valid
+
+    def revoke(self, token):
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is not None:
+                self._tokens[token] = (entry[0], False)
+
+    def purge_expired(self):
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                if self._pop_heap() is not None:
+                    removed += 1
+            self.expired += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "tokens": len(self._tokens),
+                "heap_entries": len(self._expiry_heap),
+                "max_tokens": self.max_tokens,
+                "evictions": self.evictions,
+                "expired": self.expired
+            }
+
+class DatabaseTokenStore(TokenStore):
+    """Tokens in the auth_tokens table, shared by every worker using the database"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def add(self, token, ttl=AUTH_TOKEN_TTL_SECONDS):
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.add(models.AuthToken(token=token, created_at=now, expires_at=now + timedelta(seconds=ttl)))
+            db.commit()
+        finally:
+            db.close()
+
+    def is_valid(self, token):
+        db = self.session_factory()
+        try:
+            valid = db.query(models.AuthToken.valid).filter(
+                models.AuthToken.token == token,
+                models.AuthToken.expires_at > datetime.utcnow()
+            ).scalar()
+            return bool(valid)
+        finally:
+            db.close()
+
+    def revoke(self, token):
+        db = self.session_factory()
+        try:
+            db.query(models.AuthToken).filter(models.AuthToken.token == token).update(
+                {"valid": False}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def purge_expired(self):
+        db = self.session_factory()
+        try:
+            removed = db.query(models.AuthToken).filter(
+                models.AuthToken.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self):
+        db = self.session_factory()
+        try:
+            return {
+                "backend": "database",
+                "tokens": db.query(models.AuthToken).count()
+            }
+        finally:
+            db.close()
+
+class SignedTokenStore(TokenStore):
+    """Stateless tokens: signed, expiring terms JWTs verified with CPU only.
+
+    Nothing is stored server-side, so any worker can verify any token.
+    Verified tokens are remembered in a small per-process LRU until they
+    expire, so a token presented repeatedly is only decoded once. revoke()
+    can only affect the current process.
+    """
+
+    def __init__(self, cache_size: int = AUTH_TOKEN_VERIFY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[str, float]" = OrderedDict()
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def issue(self, ttl=AUTH_TOKEN_TTL_SECONDS):
+        return create_terms_token("terms-agreement", timedelta(seconds=ttl))
+
+    def add(self, token, ttl=AUTH_TOKEN_TTL_SECONDS):
+        """No-op: a signed token carries its own expiry and is valid (or not)
+        by its signature alone, so there is nothing to store"""
+
+    def is_valid(self, token):
+        now = time.time()
+        with self._lock:
+            expires_at = self._verified.get(token)
+            if expires_at is not None:
+                if expires_at > now:
+                    self._verified.move_to_end(token)
+                    self.hits += 1
+                    return True
+                del self._verified[token]
+            self.misses += 1
+            if token in self._revoked:
+                return False
+
+        try:
+            payload = verify_terms_token(token)
+        except HTTPException:
+            return False
+
+        with self._lock:
+            self._verified[token] = payload["exp"]
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return True
+
+    def revoke(self, token):
+        try:
+            expires_at = verify_terms_token(token)["exp"]
+        except HTTPException:
+            return
+        with self._lock:
+            self._verified.pop(token, None)
+            self._revoked[token] = expires_at
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [token for token, expires_at in self._verified.items() if expires_at <= now]
+            for token in expired:
+                del self._verified[token]
+            for token in [token for token, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[token]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "signed",
+                "cached_tokens": len(self._verified),
+                "revoked_tokens": len(self._revoked),
+                "cache_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+def create_token_store(backend: str = AUTH_TOKEN_STORE) -> TokenStore:
+    """Build the token store selected by AUTH_TOKEN_STORE"""
+    if backend == "memory":
+        return MemoryTokenStore()
+    if backend == "database":
+        return DatabaseTokenStore()
+    if backend == "signed":
+        return SignedTokenStore()
+    raise ValueError(f"Unknown AUTH_TOKEN_STORE: {backend!r} (expected 'database', 'memory' or 'signed')")
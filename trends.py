@@ -0,0 +1,108 @@
+# trends.py - Activity totals bucketed by day, ISO week or month (in SQL)
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import Date, String, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.functions import FunctionElement
+import models
+
+class day_start(FunctionElement):
+    """Calendar day of a date or timestamp"""
+    type = Date()
+    name = "day_start"
+    inherit_cache = True
+
+class week_start(FunctionElement):
+    """Monday of the ISO week containing a date or timestamp"""
+    type = Date()
+    name = "week_start"
+    inherit_cache = True
+
+class month_start(FunctionElement):
+    """First day of the month containing a date or timestamp"""
+    type = Date()
+    name = "month_start"
+    inherit_cache = True
+
+# PostgreSQL and most other databases: date_trunc (its weeks start on Monday)
+@compiles(day_start)
+def _day_start(element, compiler, **kw):
+    return "CAST(date_trunc('day', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+@compiles(week_start)
+def _week_start(element, compiler, **kw):
+    return "CAST(date_trunc('week', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+@compiles(month_start)
+def _month_start(element, compiler, **kw):
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
+
+@compiles(day_start, "sqlite")
+def _day_start_sqlite(element, compiler, **kw):
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    # strftime('%w') is 0 for Sunday; step back to the preceding Monday
+    column = compiler.process(element.clauses, **kw)
+    return "date(%s, '-' || ((CAST(strftime('%%w', %s) AS INTEGER) + 6) %% 7) || ' days')" % (column, column)
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
+
+@compiles(day_start, "mysql")
+def _day_start_mysql(element, compiler, **kw):
+    return "DATE(%s)" % compiler.process(element.clauses, **kw)
+
+@compiles(week_start, "mysql")
+def _week_start_mysql(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return "DATE_SUB(DATE(%s), INTERVAL WEEKDAY(%s) DAY)" % (column, column)
+
+@compiles(month_start, "mysql")
+def _month_start_mysql(element, compiler, **kw):
+    # render_literal_value doubles the percents for pyformat drivers
+    month_format = compiler.render_literal_value("%Y-%m-01", String())
+    return "CAST(DATE_FORMAT(%s, %s) AS DATE)" % (compiler.process(element.clauses, **kw), month_format)
+
+BUCKETS = {
+    "day": day_start,
+    "week": week_start,
+    "month": month_start,
+}
+
+def activity_trends_statement(user_id: int, bucket: str, start: date, end: date, split_by_activity: bool = False) -> Select:
+    """Activity count, calories and duration per bucket over start..end (inclusive).
+
+    Totals come from daily_rollups, so a bucket costs at most one row per
+    day; with split_by_activity the activities table itself is grouped by
+    bucket and activity_name (using the (user_id, date) index). Buckets
+    without activities are omitted.
+    """
+    if split_by_activity:
+        bucket_start = BUCKETS[bucket](models.Activity.date).label("bucket")
+        return select(
+            bucket_start,
+            models.Activity.activity_name,
+            func.count(models.Activity.id).label("activities_count"),
+            func.coalesce(func.sum(models.Activity.calories_burned), 0).label("total_calories"),
+            func.coalesce(func.sum(models.Activity.duration), 0).label("total_duration")
+        ).where(
+            models.Activity.user_id == user_id,
+            models.Activity.date >= datetime.combine(start, time.min),
+            models.Activity.date < datetime.combine(end + timedelta(days=1), time.min)
+        ).group_by(bucket_start, models.Activity.activity_name).order_by(bucket_start, models.Activity.activity_name)
+
+    bucket_start = BUCKETS[bucket](models.DailyRollup.day).label("bucket")
+    return select(
+        bucket_start,
+        func.sum(models.DailyRollup.activity_count).label("activities_count"),
+        func.sum(models.DailyRollup.calories_out).label("total_calories"),
+        func.sum(models.DailyRollup.activity_minutes).label("total_duration")
+    ).where(
+        models.DailyRollup.user_id == user_id,
+        models.DailyRollup.day >= start,
+        models.DailyRollup.day <= end,
+        models.DailyRollup.activity_count > 0
+    ).group_by(bucket_start).order_by(bucket_start)